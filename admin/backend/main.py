@@ -22,6 +22,7 @@ from admin.backend.routes import (
     webhook_router,
 )
 from bot.database import close_db, init_db
+from bot.services.yookassa_service import close_yookassa_session
 
 
 @asynccontextmanager
@@ -31,6 +32,7 @@ async def lifespan(app: FastAPI):
     await init_db()
     yield
     # Shutdown
+    await close_yookassa_session()
     await close_db()
 
 
@@ -1,10 +1,13 @@
 """Webhook routes for payment providers."""
 
+import logging
+
+import orjson
 from fastapi import APIRouter, Request, Response
 
-from bot.database import async_session
-from bot.services.payment_service import PaymentService
-from bot.services.yookassa_service import YooKassaService
+from bot.services.webhook_batcher import payment_webhook_batcher
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/webhook", tags=["webhooks"])
 
@@ -19,30 +22,29 @@ async def yookassa_webhook(request: Request) -> Response:
     """
     try:
         # Parse webhook data
-        webhook_data = await request.json()
-    except Exception:
+        webhook_data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
         return Response(status_code=400, content="Invalid JSON")
 
     # Log webhook for debugging
-    event = webhook_data.get("event", "unknown")
-    payment_id = webhook_data.get("object", {}).get("id", "unknown")
-    print(f"YooKassa webhook: {event} for payment {payment_id}")
-
-    async with async_session() as session:
-        payment_service = PaymentService(session)
-        yookassa_service = YooKassaService(payment_service)
-
-        try:
-            success = await yookassa_service.handle_webhook(webhook_data)
-            if success:
-                return Response(status_code=200, content="OK")
-            else:
-                return Response(status_code=400, content="Failed to process webhook")
-        except Exception as e:
-            print(f"Webhook processing error: {e}")
-            # Return 200 anyway to prevent YooKassa from retrying
-            # We should log and investigate manually
+    logger.info(
+        "YooKassa webhook: %s for payment %s",
+        webhook_data.get("event", "unknown"),
+        webhook_data.get("object", {}).get("id", "unknown"),
+    )
+
+    try:
+        # Bursts of notifications are coalesced and processed together
+        success = await payment_webhook_batcher.submit(webhook_data)
+        if success:
             return Response(status_code=200, content="OK")
+        else:
+            return Response(status_code=400, content="Failed to process webhook")
+    except Exception:
+        logger.exception("Webhook processing error")
+        # Return 200 anyway to prevent YooKassa from retrying
+        # We should log and investigate manually
+        return Response(status_code=200, content="OK")
 
 
 @router.get("/yookassa/test")
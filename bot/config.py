@@ -44,6 +44,11 @@ class Settings(BaseSettings):
     openrouter_input_price: float = Field(default=0.0000005, alias="OPENROUTER_INPUT_PRICE")
     openrouter_output_price: float = Field(default=0.000003, alias="OPENROUTER_OUTPUT_PRICE")
 
+    # Whisper (local voice transcription)
+    # Model options: tiny, base, small, medium, large-v3, turbo
+    whisper_model: str = Field(default="small", alias="WHISPER_MODEL")
+    whisper_beam_size: int = Field(default=1, alias="WHISPER_BEAM_SIZE")
+
     # Database
     database_url: str = Field(
         default="sqlite+aiosqlite:///./data/bot.db",
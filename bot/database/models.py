@@ -1,10 +1,10 @@
 """SQLAlchemy models for EduHelper Bot."""
 
 import enum
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 
-from sqlalchemy import BigInteger, Enum, ForeignKey, Text, func
+from sqlalchemy import BigInteger, Enum, ForeignKey, Index, Text, func, text
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -57,6 +57,9 @@ class User(Base):
     total_tokens: Mapped[int] = mapped_column(default=0)
     total_cost_usd: Mapped[float] = mapped_column(default=0.0)  # Total cost in USD
     last_request_date: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    # Day (MSK) the daily counter was last counted for; the reset is
+    # computed lazily instead of being written back on every read
+    last_reset_date: Mapped[Optional[date]] = mapped_column(nullable=True)
     bonus_requests: Mapped[int] = mapped_column(default=0)  # Purchased requests (don't reset)
 
     # Status
@@ -177,6 +180,20 @@ class Subscription(Base):
     """Subscription model for storing active subscriptions."""
 
     __tablename__ = "subscriptions"
+    # Partial index covering only active rows: the frequent
+    # "active subscription for user" lookup filters on is_active and
+    # orders by expires_at, and expired rows accumulate forever.
+    # now() is not allowed in partial-index predicates, so the
+    # expires_at comparison stays in the query.
+    __table_args__ = (
+        Index(
+            "idx_subscriptions_active",
+            "user_id",
+            "expires_at",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(
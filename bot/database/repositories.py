@@ -3,7 +3,7 @@
 from datetime import date, datetime, timedelta
 from typing import List, Optional, Tuple
 
-from sqlalchemy import func, select, update
+from sqlalchemy import case, func, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -64,6 +64,58 @@ class UserRepository:
         await self.session.flush()
         return user, True
 
+    async def get_with_active_subscription(
+        self, telegram_id: int
+    ) -> Tuple[Optional[User], Optional[datetime]]:
+        """Get user and their active subscription expiry in one query.
+
+        Returns (user, expires_at); expires_at is None when there is
+        no active subscription, user is None when unknown.
+        """
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            select(User, Subscription.expires_at)
+            .outerjoin(
+                Subscription,
+                (Subscription.user_id == User.id)
+                & (Subscription.is_active == True)
+                & (Subscription.expires_at > now),
+            )
+            .where(User.telegram_id == telegram_id)
+            .order_by(Subscription.expires_at.desc())
+            .limit(1)
+        )
+        row = result.first()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
+    async def get_stats_bundle(
+        self, telegram_id: int
+    ) -> Tuple[Optional[User], Optional[str]]:
+        """Get user and their most used subject in one query.
+
+        The favorite subject is a correlated scalar subquery, so the
+        profile screen needs a single round trip instead of two.
+        """
+        favorite_subject = (
+            select(Request.detected_subject)
+            .where(Request.user_id == User.id)
+            .where(Request.detected_subject.is_not(None))
+            .group_by(Request.detected_subject)
+            .order_by(func.count(Request.id).desc())
+            .limit(1)
+            .correlate(User)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            select(User, favorite_subject).where(User.telegram_id == telegram_id)
+        )
+        row = result.first()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
     async def get_with_requests(self, user_id: int) -> Optional[User]:
         """Get user with their requests (eager loading)."""
         result = await self.session.execute(
@@ -71,6 +123,59 @@ class UserRepository:
         )
         return result.scalar_one_or_none()
 
+    async def apply_usage(
+        self,
+        telegram_id: int,
+        tokens: int,
+        cost_usd: float,
+        request_type: str = "daily",
+        today: Optional[date] = None,
+    ) -> Optional[int]:
+        """Apply one request's usage to a user in a single UPDATE.
+
+        The counter increments are chosen by request_type ("daily"
+        also bumps the daily counter, "bonus" consumes one bonus
+        request, "subscription" only updates totals). The daily
+        counter lazily rolls over when `today` is past the stored
+        last_reset_date. Returns the user's database id, or None when
+        the user is unknown.
+        """
+        values = {
+            "total_requests": User.total_requests + 1,
+            "total_tokens": User.total_tokens + tokens,
+            "total_cost_usd": User.total_cost_usd + cost_usd,
+            "last_request_date": datetime.utcnow(),
+        }
+        if request_type == "daily":
+            if today is None:
+                today = date.today()
+            # New day starts the counter at 1, same day increments it.
+            # Pre-migration rows have NULL last_reset_date; fall back
+            # to the day of the last request, mirroring how
+            # effective_daily_requests interprets such rows on reads
+            last_counted = func.coalesce(
+                User.last_reset_date, func.date(User.last_request_date)
+            )
+            values["daily_requests"] = case(
+                (last_counted.is_(None) | (last_counted < today), 1),
+                else_=User.daily_requests + 1,
+            )
+            values["last_reset_date"] = today
+        elif request_type == "bonus":
+            values["bonus_requests"] = case(
+                (User.bonus_requests > 0, User.bonus_requests - 1),
+                else_=0,
+            )
+
+        result = await self.session.execute(
+            update(User)
+            .where(User.telegram_id == telegram_id)
+            .values(**values)
+            .returning(User.id)
+        )
+        row = result.first()
+        return row[0] if row else None
+
     async def increment_requests(self, user_id: int, tokens: int) -> None:
         """Increment user's request counters."""
         user = await self.get_by_id(user_id)
@@ -397,6 +502,58 @@ class PaymentRepository:
         await self.session.flush()
         return payment
 
+    async def create_for_telegram_id(
+        self,
+        telegram_id: int,
+        amount: int,
+        currency: str,
+        provider: PaymentProvider,
+        package_type: PackageType,
+        requests_amount: int = 0,
+        provider_payment_id: Optional[str] = None,
+        status: PaymentStatus = PaymentStatus.PENDING,
+    ) -> Optional[Payment]:
+        """Create a payment for the user with the given telegram_id.
+
+        A single INSERT ... FROM SELECT resolves the user id and
+        inserts the row in one round trip; returns None when no such
+        user exists (the SELECT yields no rows).
+        """
+        cols = Payment.__table__.c
+        source = (
+            select(
+                User.id,
+                literal(amount, type_=cols.amount.type),
+                literal(currency, type_=cols.currency.type),
+                literal(provider, type_=cols.provider.type),
+                literal(package_type, type_=cols.package_type.type),
+                literal(requests_amount, type_=cols.requests_amount.type),
+                literal(provider_payment_id, type_=cols.provider_payment_id.type),
+                literal(status, type_=cols.status.type),
+            )
+            .where(User.telegram_id == telegram_id)
+        )
+
+        stmt = (
+            insert(Payment)
+            .from_select(
+                [
+                    "user_id",
+                    "amount",
+                    "currency",
+                    "provider",
+                    "package_type",
+                    "requests_amount",
+                    "provider_payment_id",
+                    "status",
+                ],
+                source,
+            )
+            .returning(Payment)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
     async def get_by_id(self, payment_id: int) -> Optional[Payment]:
         """Get payment by ID."""
         return await self.session.get(Payment, payment_id)
@@ -408,6 +565,19 @@ class PaymentRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_by_provider_ids(
+        self, provider_payment_ids: List[str]
+    ) -> List[Payment]:
+        """Get all payments matching any of the provider payment IDs."""
+        if not provider_payment_ids:
+            return []
+        result = await self.session.execute(
+            select(Payment).where(
+                Payment.provider_payment_id.in_(provider_payment_ids)
+            )
+        )
+        return list(result.scalars().all())
+
     async def get_by_telegram_charge_id(self, charge_id: str) -> Optional[Payment]:
         """Get payment by Telegram payment charge ID."""
         result = await self.session.execute(
@@ -415,6 +585,38 @@ class PaymentRepository:
         )
         return result.scalar_one_or_none()
 
+    async def mark_status_returning(
+        self,
+        payment_id: int,
+        status: PaymentStatus,
+        telegram_payment_charge_id: Optional[str] = None,
+    ) -> Optional[Tuple[PackageType, int, int]]:
+        """Atomically set payment status and return crediting info.
+
+        The WHERE clause skips rows already SUCCEEDED, so a retried
+        webhook or a concurrent handler can never credit a payment
+        twice. Returns (package_type, user_id, requests_amount), or
+        None when the payment is missing or already processed.
+        """
+        values: dict = {"status": status}
+        if telegram_payment_charge_id:
+            values["telegram_payment_charge_id"] = telegram_payment_charge_id
+        result = await self.session.execute(
+            update(Payment)
+            .where(Payment.id == payment_id)
+            .where(Payment.status != PaymentStatus.SUCCEEDED)
+            .values(**values)
+            .returning(
+                Payment.package_type,
+                Payment.user_id,
+                Payment.requests_amount,
+            )
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return row[0], row[1], row[2]
+
     async def update_status(
         self,
         payment_id: int,
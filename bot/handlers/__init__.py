@@ -1,5 +1,7 @@
 """Handlers module for EduHelper Bot."""
 
+from typing import Optional
+
 from aiogram import Router
 
 from bot.handlers.help import router as help_router
@@ -8,9 +10,19 @@ from bot.handlers.profile import router as profile_router
 from bot.handlers.question import router as question_router
 from bot.handlers.start import router as start_router
 
+_main_router: Optional[Router] = None
+
 
 def setup_routers() -> Router:
-    """Setup and return main router with all handlers."""
+    """Setup and return main router with all handlers.
+
+    The router tree (and the filter objects it holds) is built exactly
+    once per process and reused on subsequent calls.
+    """
+    global _main_router
+    if _main_router is not None:
+        return _main_router
+
     main_router = Router()
 
     # Include all routers
@@ -20,6 +32,7 @@ def setup_routers() -> Router:
     main_router.include_router(help_router)
     main_router.include_router(question_router)
 
+    _main_router = main_router
     return main_router
 
 
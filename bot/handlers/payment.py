@@ -2,6 +2,7 @@
 
 from aiogram import Bot, F, Router
 from aiogram.types import CallbackQuery, Message, PreCheckoutQuery
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.config import settings
 from bot.database import async_session
@@ -11,11 +12,13 @@ from bot.keyboards.inline import (
     get_payment_methods_keyboard,
     get_profile_keyboard,
 )
+from bot.middlewares import DatabaseMiddleware
 from bot.services.payment_service import PaymentService
 from bot.services.telegram_stars import TelegramStarsService
 from bot.services.yookassa_service import YooKassaService
 
 router = Router(name="payment")
+router.callback_query.middleware(DatabaseMiddleware())
 
 
 @router.callback_query(F.data == "buy_requests")
@@ -31,17 +34,13 @@ async def show_packages(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "back_to_profile")
-async def back_to_profile(callback: CallbackQuery) -> None:
-    """Go back to profile from packages."""
-    async with async_session() as session:
-        payment_service = PaymentService(session)
-        subscription = await payment_service.get_user_subscription(
-            callback.from_user.id
-        )
-        bonus_requests = await payment_service.get_user_bonus_requests(
-            callback.from_user.id
-        )
+@router.callback_query(F.data == "back_to_profile", flags={"readonly": True})
+async def back_to_profile(callback: CallbackQuery, session: AsyncSession) -> None:
+    """Go back to profile from packages. Display-only - no commit."""
+    payment_service = PaymentService(session)
+    bonus_requests, subscription = await payment_service.get_profile_bundle(
+        callback.from_user.id
+    )
 
     # Build profile text with payment info
     profile_lines = ["👤 **Твой профиль**\n"]
@@ -203,10 +202,7 @@ async def handle_successful_payment(message: Message, bot: Bot) -> None:
 
         if success:
             # Get updated info
-            bonus_requests = await payment_service.get_user_bonus_requests(
-                message.from_user.id
-            )
-            subscription = await payment_service.get_user_subscription(
+            bonus_requests, subscription = await payment_service.get_profile_bundle(
                 message.from_user.id
             )
 
@@ -2,27 +2,28 @@
 
 from aiogram import F, Router
 from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.database import async_session
 from bot.keyboards.inline import get_profile_keyboard
+from bot.middlewares import DatabaseMiddleware
 from bot.services import UserService
 from bot.services.payment_service import PaymentService
 from bot.utils.text_utils import format_tokens
 
 router = Router(name="profile")
+router.message.middleware(DatabaseMiddleware())
 
 
-@router.message(F.text == "👤 Профиль")
-async def show_profile(message: Message) -> None:
-    """Show user profile with statistics."""
-    async with async_session() as session:
-        user_service = UserService(session)
-        payment_service = PaymentService(session)
+@router.message(F.text == "👤 Профиль", flags={"readonly": True})
+async def show_profile(message: Message, session: AsyncSession) -> None:
+    """Show user profile with statistics. Display-only - no commit."""
+    user_service = UserService(session)
+    payment_service = PaymentService(session)
 
-        stats = await user_service.get_user_stats(message.from_user.id)
-        subscription = await payment_service.get_user_subscription(
-            message.from_user.id
-        )
+    stats = await user_service.get_user_stats(message.from_user.id)
+    subscription = await payment_service.get_user_subscription(
+        message.from_user.id
+    )
 
     if not stats:
         await message.answer("❌ Профиль не найден. Отправь /start для начала.")
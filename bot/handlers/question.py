@@ -3,7 +3,9 @@
 import asyncio
 import base64
 import logging
-from typing import Any, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
 
 from aiogram import Bot, F, Router
 from aiogram.fsm.context import FSMContext
@@ -12,6 +14,7 @@ from aiogram.types import CallbackQuery, Message
 from bot.database import async_session
 from bot.handlers.states import TaskFlow
 from bot.keyboards import (
+    InterviewOpt,
     get_interview_keyboard,
     get_interview_options_keyboard,
     get_main_keyboard,
@@ -20,16 +23,17 @@ from bot.keyboards import (
 )
 from bot.config import settings
 from bot.services import ModerationService, UserService
+from bot.services.image_store import load_image, store_image
+from bot.services.llm_cache import cached_ask_question, cached_parse_question
 from bot.services.moderation import moderation_service
 from bot.services.openrouter import openrouter_client
-from bot.utils.prompts import INTERVIEW_PROMPT, MAIN_PROMPT, PLAN_PROMPT
+from bot.utils.prompts import INTERVIEW_PLAN_PROMPT, MAIN_PROMPT, PLAN_PROMPT
 from bot.utils.text_utils import (
-    extract_interview_options,
     extract_subject,
+    fast_should_interview,
+    iter_split_message,
     remove_subject_tag,
     sanitize_markdown,
-    should_skip_interview,
-    split_message,
 )
 
 from aiogram.exceptions import TelegramBadRequest
@@ -40,6 +44,11 @@ logger = logging.getLogger(__name__)
 # Timeout for plan confirmation (5 minutes)
 PLAN_TIMEOUT = 5 * 60
 
+# Streaming preview: minimum seconds between edits (Telegram throttles
+# frequent edits) and preview length cap (edit_text limit is 4096)
+STREAM_EDIT_INTERVAL = 0.8
+STREAM_PREVIEW_LIMIT = 3500
+
 
 async def safe_send_message(
     message: Message,
@@ -68,6 +77,61 @@ async def safe_send_message(
             raise
 
 
+async def _stream_solution(
+    message: Message,
+    question: str,
+    image_base64: Optional[str],
+    context: list,
+) -> Tuple[dict, Message]:
+    """Stream the solution, live-updating a placeholder message.
+
+    Returns the final response dict (same shape as ask_question) and
+    the placeholder Message used for the live preview.
+    """
+    placeholder = await message.answer("✍️ Решаю задачу...")
+
+    messages = list(context)
+    messages.append({"role": "user", "content": question})
+
+    parts = []
+    last_edit = 0.0
+    result = None
+
+    async for kind, value in openrouter_client.chat_completion_stream(
+        messages=messages,
+        image_base64=image_base64,
+        system_prompt=MAIN_PROMPT,
+    ):
+        if kind == "done":
+            result = value
+            continue
+
+        parts.append(value)
+        now = time.monotonic()
+        if now - last_edit < STREAM_EDIT_INTERVAL:
+            continue
+        last_edit = now
+
+        preview = "".join(parts)
+        if len(preview) > STREAM_PREVIEW_LIMIT:
+            preview = preview[:STREAM_PREVIEW_LIMIT] + "…"
+
+        # Plain text during streaming - partial Markdown won't parse
+        try:
+            await placeholder.edit_text(preview, parse_mode=None)
+        except TelegramBadRequest:
+            pass
+
+    return result, placeholder
+
+
+# Recently encoded photos keyed by Telegram's file_unique_id, so a
+# photo forwarded or resent shortly after skips the download and the
+# re-encode entirely
+_IMAGE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_IMAGE_CACHE_SIZE = 16
+
+
 async def get_image_base64(message: Message, bot: Bot) -> Optional[str]:
     """Download and encode image from message."""
     if not message.photo:
@@ -75,14 +139,29 @@ async def get_image_base64(message: Message, bot: Bot) -> Optional[str]:
 
     # Get largest photo
     photo = message.photo[-1]
+
+    cached = _IMAGE_CACHE.get(photo.file_unique_id)
+    if cached is not None:
+        _IMAGE_CACHE.move_to_end(photo.file_unique_id)
+        return cached
+
     file = await bot.get_file(photo.file_id)
     file_bytes = await bot.download_file(file.file_path)
 
-    return base64.b64encode(file_bytes.read()).decode("utf-8")
+    # Base64 of a multi-MB photo is CPU-bound - keep it off the event loop
+    encoded = await asyncio.to_thread(
+        lambda: base64.b64encode(file_bytes.getbuffer()).decode("ascii")
+    )
+
+    _IMAGE_CACHE[photo.file_unique_id] = encoded
+    if len(_IMAGE_CACHE) > _IMAGE_CACHE_SIZE:
+        _IMAGE_CACHE.popitem(last=False)
+
+    return encoded
 
 
-async def get_voice_base64(message: Message, bot: Bot) -> Optional[str]:
-    """Download and encode voice message (OGG format)."""
+async def get_voice_bytes(message: Message, bot: Bot) -> Optional[bytes]:
+    """Download raw voice message audio (OGG format)."""
     if not message.voice:
         return None
 
@@ -90,7 +169,7 @@ async def get_voice_base64(message: Message, bot: Bot) -> Optional[str]:
     file = await bot.get_file(voice.file_id)
     file_bytes = await bot.download_file(file.file_path)
 
-    return base64.b64encode(file_bytes.read()).decode("utf-8")
+    return file_bytes.getvalue()
 
 
 @router.message(F.photo | F.voice | (F.text & ~F.text.startswith("/")))
@@ -136,8 +215,10 @@ async def handle_question(message: Message, state: FSMContext, bot: Bot) -> None
     # Store request type for later use
     await state.update_data(request_type=request_type)
 
-    # Get image if present
+    # Get image if present; the base64 payload goes to short-TTL Redis
+    # and only its key is kept in FSM state
     image_base64 = await get_image_base64(message, bot) if message.photo else None
+    image_key = await store_image(image_base64) if image_base64 else None
 
     # Get voice and transcribe if present
     had_voice = False
@@ -146,10 +227,10 @@ async def handle_question(message: Message, state: FSMContext, bot: Bot) -> None
         had_voice = True
         await bot.send_chat_action(message.chat.id, "typing")
 
-        voice_base64 = await get_voice_base64(message, bot)
-        if voice_base64:
-            # Transcribe voice using Gemini 2.5 Flash
-            transcription_result = await openrouter_client.transcribe_voice(voice_base64)
+        voice_bytes = await get_voice_bytes(message, bot)
+        if voice_bytes:
+            # Transcribe voice locally with Faster-Whisper
+            transcription_result = await openrouter_client.transcribe_voice_bytes(voice_bytes)
             if transcription_result:
                 # Prepend transcription to question
                 question_text = f"[Голосовое сообщение]: {transcription_result['text']}"
@@ -168,7 +249,7 @@ async def handle_question(message: Message, state: FSMContext, bot: Bot) -> None
     # Store data in state
     await state.update_data(
         question=question_text,
-        image_base64=image_base64,
+        image_key=image_key,
         had_image=bool(image_base64),
         had_voice=had_voice,
         transcription_prompt_tokens=transcription_tokens["prompt"],
@@ -179,46 +260,60 @@ async def handle_question(message: Message, state: FSMContext, bot: Bot) -> None
     # Show typing indicator
     await bot.send_chat_action(message.chat.id, "typing")
 
-    # Ask AI for interview questions (voice already transcribed to text)
+    # Cheap heuristic first: clearly self-contained questions go straight
+    # to plan generation without spending an LLM round trip on the interview
+    if fast_should_interview(question_text, bool(image_base64)) is False:
+        await generate_and_show_plan(message, state, bot)
+        return
+
+    # Single structured LLM call: the model either asks clarifying
+    # questions or produces the plan directly, so the happy path costs
+    # one HTTP round trip instead of two
     try:
-        response = await openrouter_client.ask_question(
+        response = await cached_parse_question(
             question=question_text,
-            system_prompt=INTERVIEW_PROMPT,
+            system_prompt=INTERVIEW_PLAN_PROMPT,
             image_base64=image_base64,
         )
 
-        interview_response = response["content"]
-
-        # Track tokens from interview stage
+        # Track tokens from the combined interview/plan stage
         await state.update_data(
             accumulated_prompt_tokens=response["prompt_tokens"],
             accumulated_completion_tokens=response["completion_tokens"],
         )
 
-        # Check if we should skip interview
-        if should_skip_interview(interview_response):
-            # Skip to plan generation
-            await generate_and_show_plan(message, state, bot)
-            return
-
-        # Extract options if present
-        clean_text, options = extract_interview_options(interview_response)
+        parsed = response["parsed"] or {}
+        interview_question = parsed.get("interview")
 
-        # Store interview data
-        await state.update_data(interview_question=clean_text)
-        await state.set_state(TaskFlow.interview)
+        if interview_question:
+            options = parsed.get("options") or None
 
-        # Send interview question
-        if options:
-            await message.answer(
-                clean_text,
-                reply_markup=get_interview_options_keyboard(options),
-            )
-        else:
-            await message.answer(
-                clean_text,
-                reply_markup=get_interview_keyboard(),
+            # Store interview data (options are kept server-side so option
+            # callbacks don't need to read the button text back from the markup)
+            await state.update_data(
+                interview_question=interview_question,
+                interview_options=options or [],
             )
+            await state.set_state(TaskFlow.interview)
+
+            # Send interview question
+            if options:
+                await message.answer(
+                    interview_question,
+                    reply_markup=get_interview_options_keyboard(options),
+                )
+            else:
+                await message.answer(
+                    interview_question,
+                    reply_markup=get_interview_keyboard(),
+                )
+            return
+
+        # Plan came back directly; fall back to raw content if the model
+        # ignored the JSON contract
+        plan = parsed.get("plan") or response["content"]
+        await state.update_data(plan=plan)
+        await send_plan(message, state, bot, plan)
 
     except Exception as e:
         logger.error(f"Error in interview generation: {e}")
@@ -235,38 +330,45 @@ async def handle_interview_answer(
     """Handle user's answer to interview question."""
     data = await state.get_data()
 
-    # Update context with interview answer
-    interview_context = data.get("interview_context", [])
+    # Update context with interview answer (mutate the read copy and write
+    # it back once - update_data would re-read the storage internally)
+    interview_context = data.setdefault("interview_context", [])
     interview_context.append(
         {"role": "assistant", "content": data.get("interview_question", "")}
     )
     interview_context.append({"role": "user", "content": message.text})
 
-    await state.update_data(interview_context=interview_context)
+    await state.set_data(data)
 
     # Generate plan
     await generate_and_show_plan(message, state, bot)
 
 
-@router.callback_query(F.data.startswith("interview_opt_"))
+@router.callback_query(InterviewOpt.filter())
 async def handle_interview_option(
-    callback: CallbackQuery, state: FSMContext, bot: Bot
+    callback: CallbackQuery,
+    callback_data: InterviewOpt,
+    state: FSMContext,
+    bot: Bot,
 ) -> None:
     """Handle interview option selection."""
-    # Get option text from button
-    option_idx = int(callback.data.replace("interview_opt_", ""))
-    option_text = callback.message.reply_markup.inline_keyboard[option_idx][0].text
-
     data = await state.get_data()
 
-    # Update context with interview answer
-    interview_context = data.get("interview_context", [])
+    # Get option text stored when the keyboard was built
+    options = data.get("interview_options", [])
+    if callback_data.idx >= len(options):
+        await callback.answer("Вариант устарел, отправь вопрос заново.")
+        return
+    option_text = options[callback_data.idx]
+
+    # Update context with interview answer (single read-modify-write)
+    interview_context = data.setdefault("interview_context", [])
     interview_context.append(
         {"role": "assistant", "content": data.get("interview_question", "")}
     )
     interview_context.append({"role": "user", "content": option_text})
 
-    await state.update_data(interview_context=interview_context)
+    await state.set_data(data)
     await callback.answer()
 
     # Remove keyboard and generate plan
@@ -307,7 +409,7 @@ async def generate_and_show_plan(
 
     data = await state.get_data()
     question = data.get("question", "")
-    image_base64 = data.get("image_base64")
+    image_base64 = await load_image(data.get("image_key"))
     interview_context = data.get("interview_context", [])
 
     # Build context for plan generation
@@ -315,7 +417,7 @@ async def generate_and_show_plan(
     context.extend(interview_context)
 
     try:
-        response = await openrouter_client.ask_question(
+        response = await cached_ask_question(
             question="Составь план решения этой задачи",
             system_prompt=PLAN_PROMPT,
             image_base64=image_base64,
@@ -332,29 +434,8 @@ async def generate_and_show_plan(
             accumulated_prompt_tokens=accumulated_prompt + response["prompt_tokens"],
             accumulated_completion_tokens=accumulated_completion + response["completion_tokens"],
         )
-        await state.set_state(TaskFlow.awaiting_plan)
-
-        # Send plan with safe Markdown handling
-        plan_text = plan + "\n\nПодтвердить план?"
-        sanitized_plan = sanitize_markdown(plan_text)
-        try:
-            await message.answer(
-                sanitized_plan,
-                reply_markup=get_plan_keyboard(),
-                parse_mode="Markdown",
-            )
-        except TelegramBadRequest as e:
-            if "can't parse entities" in str(e):
-                await message.answer(
-                    plan_text,
-                    reply_markup=get_plan_keyboard(),
-                    parse_mode=None,
-                )
-            else:
-                raise
 
-        # Start timeout for plan confirmation
-        asyncio.create_task(plan_timeout(message.chat.id, state, bot))
+        await send_plan(message, state, bot, plan)
 
     except Exception as e:
         logger.error(f"Error in plan generation: {e}")
@@ -365,6 +446,33 @@ async def generate_and_show_plan(
         await state.clear()
 
 
+async def send_plan(message: Message, state: FSMContext, bot: Bot, plan: str) -> None:
+    """Show a plan for confirmation and start the confirmation timeout."""
+    await state.set_state(TaskFlow.awaiting_plan)
+
+    # Send plan with safe Markdown handling
+    plan_text = plan + "\n\nПодтвердить план?"
+    sanitized_plan = sanitize_markdown(plan_text)
+    try:
+        await message.answer(
+            sanitized_plan,
+            reply_markup=get_plan_keyboard(),
+            parse_mode="Markdown",
+        )
+    except TelegramBadRequest as e:
+        if "can't parse entities" in str(e):
+            await message.answer(
+                plan_text,
+                reply_markup=get_plan_keyboard(),
+                parse_mode=None,
+            )
+        else:
+            raise
+
+    # Start timeout for plan confirmation
+    asyncio.create_task(plan_timeout(message.chat.id, state, bot))
+
+
 async def plan_timeout(chat_id: int, state: FSMContext, bot: Bot) -> None:
     """Handle plan confirmation timeout."""
     await asyncio.sleep(PLAN_TIMEOUT)
@@ -405,13 +513,13 @@ async def handle_plan_modification(
     """Handle plan modification text."""
     data = await state.get_data()
 
-    # Add modification to context
-    interview_context = data.get("interview_context", [])
+    # Add modification to context (single read-modify-write)
+    interview_context = data.setdefault("interview_context", [])
     interview_context.append(
         {"role": "user", "content": f"Измени план: {message.text}"}
     )
 
-    await state.update_data(interview_context=interview_context)
+    await state.set_data(data)
 
     # Regenerate plan
     await generate_and_show_plan(message, state, bot)
@@ -436,7 +544,7 @@ async def solve_task(message: Message, state: FSMContext, bot: Bot) -> None:
 
     data = await state.get_data()
     question = data.get("question", "")
-    image_base64 = data.get("image_base64")
+    image_base64 = await load_image(data.get("image_key"))
     interview_context = data.get("interview_context", [])
     plan = data.get("plan", "")
     had_image = data.get("had_image", False)
@@ -453,12 +561,23 @@ async def solve_task(message: Message, state: FSMContext, bot: Bot) -> None:
         context.append({"role": "user", "content": "Отлично, теперь реши задачу по этому плану"})
 
     try:
-        response = await openrouter_client.ask_question(
-            question="Реши задачу подробно, с объяснением каждого шага",
-            system_prompt=MAIN_PROMPT,
-            image_base64=image_base64,
-            context=context,
-        )
+        placeholder = None
+        if settings.webapp_url:
+            response = await cached_ask_question(
+                question="Реши задачу подробно, с объяснением каждого шага",
+                system_prompt=MAIN_PROMPT,
+                image_base64=image_base64,
+                context=context,
+            )
+        else:
+            # No Mini App - the answer goes to the chat, so stream it
+            # and show a live preview while the model generates
+            response, placeholder = await _stream_solution(
+                message,
+                "Реши задачу подробно, с объяснением каждого шага",
+                image_base64,
+                context,
+            )
 
         answer = response["content"]
 
@@ -516,15 +635,25 @@ async def solve_task(message: Message, state: FSMContext, bot: Bot) -> None:
                 reply_markup=get_solution_keyboard(request_id),
             )
         else:
-            # Fallback: send text directly (if Mini App not configured)
-            chunks = split_message(clean_answer)
-            for i, chunk in enumerate(chunks):
-                if i == len(chunks) - 1:
-                    await safe_send_message(
-                        message, chunk, reply_markup=get_main_keyboard()
-                    )
-                else:
-                    await safe_send_message(message, chunk)
+            # Fallback: send text directly (if Mini App not configured);
+            # the plain-text preview is replaced by formatted chunks
+            if placeholder is not None:
+                try:
+                    await placeholder.delete()
+                except TelegramBadRequest:
+                    pass
+            # One-behind iteration over the chunk generator: the first
+            # chunk goes out while the rest is still being split, and
+            # only the last one carries the keyboard
+            pending = None
+            for chunk in iter_split_message(clean_answer):
+                if pending is not None:
+                    await safe_send_message(message, pending)
+                pending = chunk
+            if pending is not None:
+                await safe_send_message(
+                    message, pending, reply_markup=get_main_keyboard()
+                )
 
     except Exception as e:
         logger.error(f"Error in task solving: {e}")
@@ -7,7 +7,7 @@ from aiogram.types import CallbackQuery, Message
 
 from bot.database import async_session
 from bot.database.repositories import UserRepository
-from bot.keyboards import get_guide_keyboard, get_main_keyboard
+from bot.keyboards import GuideStep, get_guide_keyboard, get_main_keyboard
 from bot.services import UserService
 
 router = Router(name="start")
@@ -75,33 +75,37 @@ async def cmd_start(message: Message, state: FSMContext) -> None:
     )
 
 
-@router.callback_query(F.data.startswith("guide_"))
-async def process_guide_callback(callback: CallbackQuery) -> None:
-    """Handle guide navigation callbacks."""
-    action = callback.data.replace("guide_", "")
-
-    if action == "finish":
-        # Mark onboarding as completed
-        async with async_session() as session:
-            user_repo = UserRepository(session)
-            user = await user_repo.get_by_telegram_id(callback.from_user.id)
-            if user:
-                await user_repo.set_onboarding_completed(user.id)
-                await session.commit()
-
-        # Show main keyboard and finish guide
-        await callback.message.edit_text(GUIDE_MESSAGES[2])
-        await callback.message.answer(
-            "Отправь мне свой вопрос! 📚",
-            reply_markup=get_main_keyboard(),
+@router.callback_query(GuideStep.filter())
+async def process_guide_step(
+    callback: CallbackQuery, callback_data: GuideStep
+) -> None:
+    """Handle guide navigation to the next step."""
+    step = callback_data.step
+    if step <= len(GUIDE_MESSAGES):
+        await callback.message.edit_text(
+            GUIDE_MESSAGES[step - 1],
+            reply_markup=get_guide_keyboard(step),
         )
-    else:
-        # Show next guide step
-        step = int(action)
-        if step <= len(GUIDE_MESSAGES):
-            await callback.message.edit_text(
-                GUIDE_MESSAGES[step - 1],
-                reply_markup=get_guide_keyboard(step),
-            )
+
+    await callback.answer()
+
+
+@router.callback_query(F.data == "guide_finish")
+async def process_guide_finish(callback: CallbackQuery) -> None:
+    """Handle guide completion."""
+    # Mark onboarding as completed
+    async with async_session() as session:
+        user_repo = UserRepository(session)
+        user = await user_repo.get_by_telegram_id(callback.from_user.id)
+        if user:
+            await user_repo.set_onboarding_completed(user.id)
+            await session.commit()
+
+    # Show main keyboard and finish guide
+    await callback.message.edit_text(GUIDE_MESSAGES[2])
+    await callback.message.answer(
+        "Отправь мне свой вопрос! 📚",
+        reply_markup=get_main_keyboard(),
+    )
 
     await callback.answer()
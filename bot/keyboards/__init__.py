@@ -1,5 +1,6 @@
 """Keyboards module for EduHelper Bot."""
 
+from bot.keyboards.callbacks import GuideStep, InterviewOpt
 from bot.keyboards.inline import (
     get_cancel_keyboard,
     get_guide_keyboard,
@@ -11,6 +12,8 @@ from bot.keyboards.inline import (
 from bot.keyboards.reply import get_main_keyboard
 
 __all__ = [
+    "GuideStep",
+    "InterviewOpt",
     "get_main_keyboard",
     "get_guide_keyboard",
     "get_interview_keyboard",
@@ -0,0 +1,15 @@
+"""Callback data factories for inline keyboards."""
+
+from aiogram.filters.callback_data import CallbackData
+
+
+class InterviewOpt(CallbackData, prefix="io"):
+    """Interview answer option, referenced by its index in the keyboard."""
+
+    idx: int
+
+
+class GuideStep(CallbackData, prefix="g"):
+    """Guide navigation to a specific step."""
+
+    step: int
@@ -6,6 +6,7 @@ from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 
 from bot.config import settings
 from bot.database.models import PackageType
+from bot.keyboards.callbacks import GuideStep, InterviewOpt
 from bot.services.payment_service import Package, PaymentService
 
 
@@ -14,7 +15,12 @@ def get_guide_keyboard(step: int) -> InlineKeyboardMarkup:
     if step < 3:
         return InlineKeyboardMarkup(
             inline_keyboard=[
-                [InlineKeyboardButton(text="Далее →", callback_data=f"guide_{step + 1}")]
+                [
+                    InlineKeyboardButton(
+                        text="Далее →",
+                        callback_data=GuideStep(step=step + 1).pack(),
+                    )
+                ]
             ]
         )
     else:
@@ -47,7 +53,7 @@ def get_interview_keyboard() -> InlineKeyboardMarkup:
 def get_interview_options_keyboard(options: List[str]) -> InlineKeyboardMarkup:
     """Get keyboard with interview answer options."""
     buttons = [
-        [InlineKeyboardButton(text=opt, callback_data=f"interview_opt_{i}")]
+        [InlineKeyboardButton(text=opt, callback_data=InterviewOpt(idx=i).pack())]
         for i, opt in enumerate(options)
     ]
     buttons.append(
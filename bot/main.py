@@ -1,26 +1,41 @@
 """Main entry point for EduHelper Bot."""
 
 import asyncio
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 
+import orjson
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
 
 from bot.config import settings
 from bot.database import close_db, init_db
 from bot.handlers import setup_routers
 from bot.middlewares import LoggingMiddleware
 from bot.services.openrouter import openrouter_client
-
-# Configure logging
+from bot.services.redis_client import close_redis
+from bot.services.yookassa_service import close_yookassa_session
+
+# Configure logging: handlers publish to an in-process queue and a
+# background listener thread does the actual stdout writes, so the
+# event loop never blocks on slow/back-pressured container stdout
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+)
 logging.basicConfig(
     level=getattr(logging, settings.log_level.upper()),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
 )
+_log_listener = logging.handlers.QueueListener(_log_queue, _stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +48,13 @@ async def on_startup(bot: Bot) -> None:
     await init_db()
     logger.info("Database initialized")
 
+    # Warm the Whisper model in the background so the first voice
+    # message doesn't pay the model load cost
+    asyncio.create_task(openrouter_client.preload_whisper())
+
+    # Pre-establish the OpenRouter TLS connection and DNS cache
+    asyncio.create_task(openrouter_client.warmup())
+
     # Get bot info
     me = await bot.get_me()
     logger.info(f"Bot started: @{me.username}")
@@ -45,6 +67,12 @@ async def on_shutdown(bot: Bot) -> None:
     # Close OpenRouter client
     await openrouter_client.close()
 
+    # Close shared Redis client
+    await close_redis()
+
+    # Close shared YooKassa session
+    await close_yookassa_session()
+
     # Close database connections
     await close_db()
 
@@ -59,11 +87,14 @@ async def main() -> None:
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
-    # Initialize storage
-    # For production, use Redis:
-    # from aiogram.fsm.storage.redis import RedisStorage
-    # storage = RedisStorage.from_url(settings.redis_url)
-    storage = MemoryStorage()
+    # Initialize storage (Redis keeps FSM state out of the process heap
+    # and allows running several bot processes); orjson is much faster
+    # than stdlib json on the large string payloads FSM state carries
+    storage = RedisStorage.from_url(
+        settings.redis_url,
+        json_loads=orjson.loads,
+        json_dumps=lambda obj: orjson.dumps(obj).decode(),
+    )
 
     # Initialize dispatcher
     dp = Dispatcher(storage=storage)
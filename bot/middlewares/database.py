@@ -4,13 +4,18 @@ from collections.abc import Awaitable, Callable
 from typing import Any
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject
 
 from bot.database import async_session
 
 
 class DatabaseMiddleware(BaseMiddleware):
-    """Middleware that provides database session to handlers."""
+    """Middleware that provides database session to handlers.
+
+    Handlers marked with flags={"readonly": True} skip the final
+    commit - no write means nothing to flush or fsync.
+    """
 
     async def __call__(
         self,
@@ -18,11 +23,14 @@ class DatabaseMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
+        readonly = get_flag(data, "readonly")
+
         async with async_session() as session:
             data["session"] = session
             try:
                 result = await handler(event, data)
-                await session.commit()
+                if not readonly:
+                    await session.commit()
                 return result
             except Exception:
                 await session.rollback()
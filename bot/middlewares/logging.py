@@ -20,35 +20,48 @@ class LoggingMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        start_time = time.time()
+        # monotonic() can't jump on clock adjustments and is cheaper
+        # than time() on most platforms
+        start_time = time.monotonic()
 
         # Get user info if available
         user_id = None
-        username = None
         event_type = type(event).__name__
 
         if isinstance(event, Message):
-            user_id = event.from_user.id if event.from_user else None
-            username = event.from_user.username if event.from_user else None
-            text_preview = (event.text or event.caption or "")[:50]
-            logger.info(
-                f"Message from {user_id} (@{username}): {text_preview}..."
-                if len(text_preview) == 50
-                else f"Message from {user_id} (@{username}): {text_preview}"
-            )
-        else:
-            logger.debug(f"Event: {event_type}")
+            from_user = event.from_user
+            if from_user is not None:
+                user_id = from_user.id
+            # Guard so the preview slice and formatting are skipped
+            # entirely when INFO is disabled
+            if logger.isEnabledFor(logging.INFO):
+                username = from_user.username if from_user else None
+                text_preview = (event.text or event.caption or "")[:50]
+                suffix = "..." if len(text_preview) == 50 else ""
+                logger.info(
+                    "Message from %s (@%s): %s%s",
+                    user_id,
+                    username,
+                    text_preview,
+                    suffix,
+                )
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Event: %s", event_type)
 
         try:
             result = await handler(event, data)
-            elapsed = (time.time() - start_time) * 1000
-            logger.debug(f"Handler completed in {elapsed:.2f}ms")
+            if logger.isEnabledFor(logging.DEBUG):
+                elapsed = (time.monotonic() - start_time) * 1000
+                logger.debug("Handler completed in %.2fms", elapsed)
             return result
 
         except Exception as e:
-            elapsed = (time.time() - start_time) * 1000
+            elapsed = (time.monotonic() - start_time) * 1000
             logger.error(
-                f"Handler error after {elapsed:.2f}ms: {type(e).__name__}: {e}",
+                "Handler error after %.2fms: %s: %s",
+                elapsed,
+                type(e).__name__,
+                e,
                 extra={
                     "user_id": user_id,
                     "event_type": event_type,
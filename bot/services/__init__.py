@@ -1,11 +1,12 @@
 """Services module for EduHelper Bot."""
 
 from bot.services.moderation import ModerationService
-from bot.services.openrouter import OpenRouterClient
+from bot.services.openrouter import OpenRouterClient, openrouter_client
 from bot.services.user_service import UserService
 
 __all__ = [
     "OpenRouterClient",
+    "openrouter_client",
     "UserService",
     "ModerationService",
 ]
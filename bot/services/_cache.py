@@ -0,0 +1,17 @@
+"""Short-TTL in-process caches for hot read paths.
+
+These caches only serve display reads (profile screen, payment
+menus). The limit-enforcement path always goes to the database, so a
+stale entry can never grant extra requests - at worst the profile
+shows numbers up to 30 seconds old.
+"""
+
+from cachetools import TTLCache
+
+# telegram_id -> (bonus_requests, subscription expires_at or None)
+profile_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+
+def invalidate_user(telegram_id: int) -> None:
+    """Drop cached profile data for a user after a write."""
+    profile_cache.pop(telegram_id, None)
@@ -0,0 +1,36 @@
+"""Short-TTL Redis store for downloaded images.
+
+A base64-encoded photo is hundreds of KB; keeping it out of FSM state
+means storage payloads stay small and images expire on their own instead
+of living in memory until state.clear() fires.
+"""
+
+import uuid
+from typing import Optional
+
+from bot.services.redis_client import get_redis
+
+# Images expire after an hour: the interview and plan-editing stages
+# have no timeout, so the TTL must comfortably outlast a slow dialog
+IMAGE_TTL = 60 * 60
+
+
+async def store_image(image_base64: str) -> str:
+    """Store a base64-encoded image, return its key."""
+    key = f"img:{uuid.uuid4().hex}"
+    await get_redis().setex(key, IMAGE_TTL, image_base64)
+    return key
+
+
+async def load_image(image_key: Optional[str]) -> Optional[str]:
+    """Load a previously stored image by key, None if missing or expired."""
+    if not image_key:
+        return None
+    redis = get_redis()
+    value = await redis.get(image_key)
+    if value is None:
+        return None
+    # Re-arm the expiry so the image survives as long as the dialog
+    # keeps touching it, however slowly the user answers
+    await redis.expire(image_key, IMAGE_TTL)
+    return value.decode("utf-8")
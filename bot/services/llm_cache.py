@@ -0,0 +1,113 @@
+"""Redis-backed exact-match cache for LLM responses.
+
+Students frequently re-ask identical homework questions and the system
+prompts are deterministic, so a cache hit short-circuits the whole LLM
+call - the full request latency and token cost disappear.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bot.services.openrouter import openrouter_client
+from bot.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Cached answers stay valid for a week
+CACHE_TTL = 7 * 24 * 60 * 60
+
+
+def _cache_key(
+    method: str,
+    system_prompt: str,
+    question: str,
+    image_base64: Optional[str],
+    context: Optional[List[dict]],
+) -> str:
+    """Build cache key from everything that affects the response."""
+    hasher = hashlib.blake2b(digest_size=16)
+    # Model and generation parameters change the answer too - without
+    # them a model switch would keep serving week-old cached replies
+    hasher.update(
+        f"{openrouter_client.model}|{openrouter_client.temperature}"
+        f"|{openrouter_client.max_tokens}".encode("utf-8")
+    )
+    hasher.update(b"\x00")
+    hasher.update(system_prompt.encode("utf-8"))
+    hasher.update(b"\x00")
+    hasher.update(question.encode("utf-8"))
+    hasher.update(b"\x00")
+    if image_base64:
+        hasher.update(image_base64.encode("ascii"))
+    hasher.update(b"\x00")
+    if context:
+        hasher.update(json.dumps(context, ensure_ascii=False).encode("utf-8"))
+    return f"llm:{method}:{hasher.hexdigest()}"
+
+
+async def _with_cache(
+    key: str, call: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Return cached response for key, calling through on a miss."""
+    try:
+        cached = await get_redis().get(key)
+    except Exception as e:
+        # Redis being down must not break the bot - just call the API
+        logger.warning(f"LLM cache read failed: {e}")
+        cached = None
+
+    if cached:
+        response = json.loads(cached)
+        response["response_time_ms"] = 0
+        return response
+
+    response = await call()
+
+    try:
+        await get_redis().setex(
+            key, CACHE_TTL, json.dumps(response, ensure_ascii=False)
+        )
+    except Exception as e:
+        logger.warning(f"LLM cache write failed: {e}")
+
+    return response
+
+
+async def cached_ask_question(
+    question: str,
+    system_prompt: str,
+    image_base64: Optional[str] = None,
+    context: Optional[List[dict]] = None,
+) -> Dict[str, Any]:
+    """OpenRouterClient.ask_question with a Redis cache in front."""
+    key = _cache_key("ask", system_prompt, question, image_base64, context)
+    return await _with_cache(
+        key,
+        lambda: openrouter_client.ask_question(
+            question=question,
+            system_prompt=system_prompt,
+            image_base64=image_base64,
+            context=context,
+        ),
+    )
+
+
+async def cached_parse_question(
+    question: str,
+    system_prompt: str,
+    image_base64: Optional[str] = None,
+    context: Optional[List[dict]] = None,
+) -> Dict[str, Any]:
+    """OpenRouterClient.parse_question with a Redis cache in front."""
+    key = _cache_key("parse", system_prompt, question, image_base64, context)
+    return await _with_cache(
+        key,
+        lambda: openrouter_client.parse_question(
+            question=question,
+            system_prompt=system_prompt,
+            image_base64=image_base64,
+            context=context,
+        ),
+    )
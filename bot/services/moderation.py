@@ -1,7 +1,111 @@
 """Content moderation service for filtering inappropriate content."""
 
 import re
-from typing import NamedTuple, Optional
+from typing import List, NamedTuple, Optional
+
+try:
+    import re2  # google-re2: linear-time matching, no backtracking
+except ImportError:
+    re2 = None
+
+try:
+    import hyperscan  # Intel Hyperscan: SIMD multi-pattern matching
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick  # pyahocorasick: multi-substring search
+except ImportError:
+    ahocorasick = None
+
+
+# Literal stems that must appear (lowercased) for any moderation
+# pattern to possibly match. Checking plain substrings first skips the
+# regex engines entirely for the vast majority of ordinary questions.
+# Every stem is a single whitespace-free token, so the \s+ gaps inside
+# the patterns can never split one; profanity stems cover every
+# Cyrillic/Latin homoglyph combination of the first two characters of
+# each pattern. A stem firing without a real match only costs one
+# regex pass.
+_TRIGGER_SUBSTRINGS = frozenset(
+    [
+        "забудь", "ignore", "теперь", "притвор", "act", "pretend",
+        "you", "роль", "role", "override", "переопредели",
+        "prompt", "промпт", "developer", "разработ", "dan",
+        "jailbreak", "джейлбрейк",
+    ]
+    + [a + b for a in "хx" for b in "уy"]
+    + [a + b for a in "пp" for b in "иi"]
+    + [a + b for a in "бb" for b in "лl"]
+    + [a + b for a in "еe" for b in "бb"]
+    + [a + b for a in "сc" for b in "уy"]
+    + [a + b for a in "мm" for b in "уy"]
+    + [a + b for a in "гg" for b in "аa"]
+    + ["fu", "sh", "ass", "bi", "di", "cu"]
+)
+
+
+def _build_trigger_automaton():
+    """Build an Aho-Corasick automaton over the trigger stems."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for idx, stem in enumerate(_TRIGGER_SUBSTRINGS):
+        automaton.add_word(stem, idx)
+    automaton.make_automaton()
+    return automaton
+
+
+_TRIGGER_AUTOMATON = _build_trigger_automaton()
+
+
+def _has_trigger(text_lower: str) -> bool:
+    """Check whether any literal trigger stem occurs in the text.
+
+    With pyahocorasick installed this is a single pass over the text
+    regardless of how many stems there are; otherwise it falls back to
+    one substring scan per stem.
+    """
+    if _TRIGGER_AUTOMATON is not None:
+        return next(_TRIGGER_AUTOMATON.iter(text_lower), None) is not None
+    return any(t in text_lower for t in _TRIGGER_SUBSTRINGS)
+
+
+class _HyperscanMatcher:
+    """Adapter exposing re-style search() over a hyperscan database."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def search(self, text: str) -> bool:
+        try:
+            self._db.scan(text.encode("utf-8"), match_event_handler=self._on_match)
+        except hyperscan.ScanTerminated:
+            return True
+        return False
+
+    @staticmethod
+    def _on_match(pattern_id, start, end, flags, context):
+        # Returning truthy halts the scan at the first match
+        return True
+
+
+def _compile_hyperscan(patterns: List[str]) -> Optional[_HyperscanMatcher]:
+    """Compile patterns into one hyperscan block-mode database."""
+    flags = (
+        hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+    )
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[p.encode("utf-8") for p in patterns],
+            ids=list(range(len(patterns))),
+            flags=[flags] * len(patterns),
+        )
+    except Exception:
+        # Hyperscan rejects some constructs at compile time - fall back
+        return None
+    return _HyperscanMatcher(db)
 
 
 class ModerationResult(NamedTuple):
@@ -11,59 +115,117 @@ class ModerationResult(NamedTuple):
     reason: Optional[str] = None
 
 
-class ModerationService:
-    """Service for content moderation and filtering."""
-
-    # Jailbreak patterns to block
-    JAILBREAK_PATTERNS = [
-        r"забудь\s+(все\s+)?инструкции",
-        r"ignore\s+(all\s+)?(previous\s+)?prompt",
-        r"ignore\s+(all\s+)?(previous\s+)?instructions",
-        r"ты\s+теперь\s+(?!помощник)",
-        r"притворись\s+что\s+ты",
-        r"act\s+as\s+if\s+you",
-        r"pretend\s+(that\s+)?you\s+are",
-        r"you\s+are\s+now\s+(?!an?\s+(educational|helpful))",
-        r"новая\s+роль",
-        r"new\s+role",
-        r"override\s+(your\s+)?instructions",
-        r"переопредели\s+инструкции",
-        r"system\s*prompt",
-        r"системный\s*промпт",
-        r"developer\s+mode",
-        r"режим\s+разработчика",
-        r"dan\s+mode",
-        r"jailbreak",
-        r"джейлбрейк",
-    ]
+# Jailbreak patterns to block
+JAILBREAK_PATTERNS = [
+    r"забудь\s+(все\s+)?инструкции",
+    r"ignore\s+(all\s+)?(previous\s+)?prompt",
+    r"ignore\s+(all\s+)?(previous\s+)?instructions",
+    r"ты\s+теперь\s+(?!помощник)",
+    r"притворись\s+что\s+ты",
+    r"act\s+as\s+if\s+you",
+    r"pretend\s+(that\s+)?you\s+are",
+    r"you\s+are\s+now\s+(?!an?\s+(educational|helpful))",
+    r"новая\s+роль",
+    r"new\s+role",
+    r"override\s+(your\s+)?instructions",
+    r"переопредели\s+инструкции",
+    r"system\s*prompt",
+    r"системный\s*промпт",
+    r"developer\s+mode",
+    r"режим\s+разработчика",
+    r"dan\s+mode",
+    r"jailbreak",
+    r"джейлбрейк",
+]
 
-    # Profanity patterns (basic Russian + English)
-    PROFANITY_PATTERNS = [
-        # Russian mat (основные корни)
-        r"\b[хx][уy][йеёия]",
-        r"\b[пp][иi][зz][дd]",
-        r"\b[бb][лl][яa]",
-        r"\b[еe][бb](?:[аaуyиi]|[лl][оoаaиi])",
-        r"\b[сc][уy][кk][аa]",
-        r"\b[мm][уy][дd][аaоoиi]",
-        r"\b[гg][аa][нn][дd][оo][нn]",
-        # English profanity
-        r"\bf+u+c+k+",
-        r"\bs+h+i+t+",
-        r"\ba+s+s+h+o+l+e+",
-        r"\bb+i+t+c+h+",
-        r"\bd+i+c+k+",
-        r"\bc+u+n+t+",
-    ]
+# Profanity patterns (basic Russian + English)
+PROFANITY_PATTERNS = [
+    # Russian mat (основные корни)
+    r"\b[хx][уy][йеёия]",
+    r"\b[пp][иi][зz][дd]",
+    r"\b[бb][лl][яa]",
+    r"\b[еe][бb](?:[аaуyиi]|[лl][оoаaиi])",
+    r"\b[сc][уy][кk][аa]",
+    r"\b[мm][уy][дd][аaоoиi]",
+    r"\b[гg][аa][нn][дd][оo][нn]",
+    # English profanity
+    r"\bf+u+c+k+",
+    r"\bs+h+i+t+",
+    r"\ba+s+s+h+o+l+e+",
+    r"\bb+i+t+c+h+",
+    r"\bd+i+c+k+",
+    r"\bc+u+n+t+",
+]
+
+_CYRILLIC_RE = re.compile("[а-яё]", re.IGNORECASE)
+
+
+def _needs_unicode_boundary(pattern: str) -> bool:
+    r"""Check for \b next to Cyrillic - needs a Unicode-aware engine.
+
+    re2's \b is an ASCII word boundary, so such patterns would
+    silently never match inside Cyrillic text there. Hyperscan with
+    HS_FLAG_UCP and the stdlib engine handle them correctly.
+    """
+    return r"\b" in pattern and _CYRILLIC_RE.search(pattern) is not None
+
+
+def _compile_category(patterns: List[str]) -> list:
+    """Compile a category into at most two combined matchers.
+
+    Engine priority for patterns without lookarounds: hyperscan
+    (SIMD multi-pattern scan), then google-re2 (linear-time
+    alternation), then a single stdlib alternation. The two
+    lookahead patterns always stay on the stdlib engine - neither
+    hyperscan nor re2 implements lookarounds - and \b-anchored
+    Cyrillic patterns additionally stay off re2, whose \b is
+    ASCII-only. With no optional engine installed everything is one
+    stdlib alternation.
+    """
+    matchers = []
+    supported = [p for p in patterns if "(?!" not in p]
+    stdlib_only = [p for p in patterns if "(?!" in p]
+
+    fast = None
+    if supported:
+        if hyperscan is not None:
+            fast = _compile_hyperscan(supported)
+        if fast is None and re2 is not None:
+            re2_safe = [p for p in supported if not _needs_unicode_boundary(p)]
+            if re2_safe:
+                fast = re2.compile(
+                    "|".join(f"(?:{p})" for p in re2_safe),
+                    re.IGNORECASE,
+                )
+                stdlib_only = stdlib_only + [
+                    p for p in supported if _needs_unicode_boundary(p)
+                ]
+    if fast is not None:
+        matchers.append(fast)
+    else:
+        stdlib_only = patterns
 
-    def __init__(self):
-        # Compile patterns for performance
-        self._jailbreak_re = [
-            re.compile(p, re.IGNORECASE | re.UNICODE) for p in self.JAILBREAK_PATTERNS
-        ]
-        self._profanity_re = [
-            re.compile(p, re.IGNORECASE | re.UNICODE) for p in self.PROFANITY_PATTERNS
-        ]
+    if stdlib_only:
+        matchers.append(
+            re.compile(
+                "|".join(f"(?:{p})" for p in stdlib_only),
+                re.IGNORECASE | re.UNICODE,
+            )
+        )
+    return matchers
+
+
+# Compiled once at import; the service holds no per-instance state
+_JAILBREAK_MATCHERS = _compile_category(JAILBREAK_PATTERNS)
+_PROFANITY_MATCHERS = _compile_category(PROFANITY_PATTERNS)
+
+
+class ModerationService:
+    """Service for content moderation and filtering.
+
+    All matchers are module-level constants compiled at import time,
+    so instances are free to construct.
+    """
 
     def check_content(self, text: str) -> ModerationResult:
         """
@@ -80,21 +242,24 @@ class ModerationService:
 
         text_lower = text.lower()
 
+        # Cheap literal prefilter - no stem present means no pattern
+        # can match, so skip the regex engines altogether
+        if not _has_trigger(text_lower):
+            return ModerationResult(is_allowed=True)
+
         # Check for jailbreak attempts
-        for pattern in self._jailbreak_re:
-            if pattern.search(text_lower):
-                return ModerationResult(
-                    is_allowed=False,
-                    reason="jailbreak_attempt",
-                )
+        if any(m.search(text_lower) for m in _JAILBREAK_MATCHERS):
+            return ModerationResult(
+                is_allowed=False,
+                reason="jailbreak_attempt",
+            )
 
         # Check for profanity
-        for pattern in self._profanity_re:
-            if pattern.search(text_lower):
-                return ModerationResult(
-                    is_allowed=False,
-                    reason="profanity",
-                )
+        if any(m.search(text_lower) for m in _PROFANITY_MATCHERS):
+            return ModerationResult(
+                is_allowed=False,
+                reason="profanity",
+            )
 
         return ModerationResult(is_allowed=True)
 
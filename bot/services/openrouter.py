@@ -3,16 +3,48 @@
 import asyncio
 import base64
 import logging
+import os
+import random
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Dict, List, Optional, Union
 
 import aiohttp
+import orjson
 from aiohttp import ClientTimeout
 
 from bot.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Single shared session for all clients: one connection pool with
+# keep-alive and DNS caching instead of a pool per client instance
+_shared_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_shared_session() -> aiohttp.ClientSession:
+    """Get or create the module-wide aiohttp session."""
+    global _shared_session
+    if _shared_session is None or _shared_session.closed:
+        _shared_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=30,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+            ),
+        )
+    return _shared_session
+
+
+async def close_shared_session() -> None:
+    """Close the module-wide aiohttp session."""
+    global _shared_session
+    if _shared_session and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+
 
 class OpenRouterClient:
     """Async client for OpenRouter API with retry logic."""
@@ -32,26 +64,39 @@ class OpenRouterClient:
         self.max_tokens = max_tokens or settings.openrouter_max_tokens
         self.temperature = temperature or settings.openrouter_temperature
         self.timeout = ClientTimeout(total=timeout or settings.openrouter_timeout)
-        self._session: Optional[aiohttp.ClientSession] = None
+        # Auth/identity headers are per-client; the session is shared
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://eduhelper.bot",
+            "X-Title": "EduHelper Bot",
+        }
+
+    async def warmup(self) -> None:
+        """Open a connection to OpenRouter ahead of the first request.
 
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session."""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(
+        A lightweight GET establishes the TCP+TLS connection (kept
+        alive in the shared pool) and fills the DNS cache, so the
+        first real completion skips the handshake latency.
+        """
+        session = _get_shared_session()
+        try:
+            async with session.get(
+                f"{self.BASE_URL}/models",
+                headers=self._headers,
                 timeout=self.timeout,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://eduhelper.bot",
-                    "X-Title": "EduHelper Bot",
-                },
-            )
-        return self._session
+            ) as resp:
+                await resp.read()
+            logger.info("OpenRouter connection warmed up")
+        except Exception as e:
+            # Warmup is best-effort - the first request just pays the
+            # handshake itself if this fails
+            logger.warning(f"OpenRouter warmup failed: {e}")
 
     async def close(self) -> None:
-        """Close the aiohttp session."""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """Close the shared aiohttp session and the transcription worker."""
+        await close_shared_session()
+        shutdown_whisper_executor()
 
     async def _request_with_retry(
         self,
@@ -60,38 +105,62 @@ class OpenRouterClient:
         json_data: Optional[dict] = None,
         max_attempts: int = 3,
     ) -> Dict[str, Any]:
-        """Make HTTP request with retry logic."""
-        session = await self._get_session()
+        """Make HTTP request with exponential-backoff retry logic."""
+        session = _get_shared_session()
         url = f"{self.BASE_URL}{endpoint}"
+        # Serialize once with orjson (Content-Type is already
+        # application/json in the client headers)
+        data = orjson.dumps(json_data) if json_data is not None else None
+
+        # Total sleep between attempts is capped so retries can't hold
+        # a handler much longer than one slow request would
+        retry_budget = float(self.timeout.total or 60)
 
         for attempt in range(max_attempts):
+            delay = None
             try:
-                async with session.request(method, url, json=json_data) as resp:
-                    if resp.status == 429:  # Rate limit
-                        retry_after = int(resp.headers.get("Retry-After", 5))
-                        logger.warning(f"Rate limited, waiting {retry_after}s")
-                        await asyncio.sleep(retry_after)
-                        continue
-
-                    if resp.status >= 500:  # Server error
+                async with session.request(
+                    method,
+                    url,
+                    data=data,
+                    headers=self._headers,
+                    timeout=self.timeout,
+                ) as resp:
+                    if resp.status in (429, 502, 503):
+                        # Honor the server's Retry-After hint if present
+                        retry_after = resp.headers.get("Retry-After")
+                        if retry_after:
+                            try:
+                                delay = float(retry_after)
+                            except ValueError:
+                                pass
+                        logger.warning(f"HTTP {resp.status}, retrying...")
+                    elif resp.status >= 500:
                         logger.warning(f"Server error {resp.status}, retrying...")
-                        await asyncio.sleep(1 * (attempt + 1))
-                        continue
-
-                    resp.raise_for_status()
-                    return await resp.json()
+                    else:
+                        resp.raise_for_status()
+                        return orjson.loads(await resp.read())
 
             except aiohttp.ClientConnectionError as e:
                 logger.warning(f"Connection error (attempt {attempt + 1}): {e}")
                 if attempt + 1 == max_attempts:
                     raise
-                await asyncio.sleep(0.5 * (attempt + 1))
 
             except asyncio.TimeoutError:
                 logger.warning(f"Timeout (attempt {attempt + 1})")
                 if attempt + 1 == max_attempts:
                     raise
-                await asyncio.sleep(1)
+
+            if attempt + 1 == max_attempts:
+                break
+
+            if delay is None:
+                # Exponential backoff with jitter to avoid retry bursts
+                delay = min(30.0, 0.5 * (2 ** attempt) + random.uniform(0, 0.5))
+            if delay > retry_budget:
+                break
+            retry_budget -= delay
+            await asyncio.sleep(delay)
 
         raise RuntimeError("Max retry attempts exceeded")
 
@@ -124,12 +193,46 @@ class OpenRouterClient:
 
         return content
 
+    def _build_request_messages(
+        self,
+        messages: List[Dict[str, Any]],
+        image_base64: Optional[str] = None,
+        voice_base64: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Assemble the final message list for a completion request."""
+        has_attachment = bool(image_base64 or voice_base64)
+
+        # Nothing to prepend or rewrite - use the list as-is
+        if not system_prompt and not has_attachment:
+            return messages
+
+        request_messages = []
+
+        if system_prompt:
+            request_messages.append({"role": "system", "content": system_prompt})
+
+        request_messages.extend(messages)
+
+        # Attach image/voice to the last message if it's from the user
+        # (index check instead of comparing whole message dicts)
+        if has_attachment and messages and messages[-1]["role"] == "user":
+            request_messages[-1] = {
+                "role": "user",
+                "content": self._build_message_content(
+                    messages[-1]["content"], image_base64, voice_base64
+                ),
+            }
+
+        return request_messages
+
     async def chat_completion(
         self,
         messages: List[Dict[str, Any]],
         image_base64: Optional[str] = None,
         voice_base64: Optional[str] = None,
         system_prompt: Optional[str] = None,
+        response_format: Optional[dict] = None,
     ) -> Dict[str, Any]:
         """
         Send chat completion request.
@@ -139,31 +242,16 @@ class OpenRouterClient:
             image_base64: Optional base64-encoded image
             voice_base64: Optional base64-encoded voice (OGG format)
             system_prompt: Optional system prompt to prepend
+            response_format: Optional response format (e.g. JSON mode)
 
         Returns:
             dict with 'content', 'tokens', 'response_time_ms'
         """
         start_time = time.time()
 
-        # Build messages list
-        request_messages = []
-
-        if system_prompt:
-            request_messages.append({"role": "system", "content": system_prompt})
-
-        for msg in messages:
-            if msg["role"] == "user" and (image_base64 or voice_base64) and msg == messages[-1]:
-                # Add image/voice to the last user message
-                request_messages.append(
-                    {
-                        "role": "user",
-                        "content": self._build_message_content(
-                            msg["content"], image_base64, voice_base64
-                        ),
-                    }
-                )
-            else:
-                request_messages.append(msg)
+        request_messages = self._build_request_messages(
+            messages, image_base64, voice_base64, system_prompt
+        )
 
         payload = {
             "model": self.model,
@@ -172,6 +260,9 @@ class OpenRouterClient:
             "temperature": self.temperature,
         }
 
+        if response_format:
+            payload["response_format"] = response_format
+
         # Debug: log if audio is being sent
         has_audio = any(
             isinstance(msg.get("content"), list) and
@@ -198,6 +289,85 @@ class OpenRouterClient:
             "model": self.model,
         }
 
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        image_base64: Optional[str] = None,
+        voice_base64: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ):
+        """
+        Stream a chat completion via server-sent events.
+
+        The first tokens arrive after the model's prefill instead of
+        after the full generation, so the user sees the answer start
+        seconds earlier.
+
+        Yields:
+            ("delta", text) for each content fragment, then one final
+            ("done", result) where result has the same shape as the
+            chat_completion return value.
+        """
+        start_time = time.time()
+
+        request_messages = self._build_request_messages(
+            messages, image_base64, voice_base64, system_prompt
+        )
+
+        payload = {
+            "model": self.model,
+            "messages": request_messages,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "stream": True,
+            # Ask OpenRouter to append a usage chunk to the stream
+            "stream_options": {"include_usage": True},
+        }
+
+        session = _get_shared_session()
+        url = f"{self.BASE_URL}/chat/completions"
+        parts: List[str] = []
+        usage: Dict[str, Any] = {}
+
+        async with session.post(
+            url,
+            data=orjson.dumps(payload),
+            headers=self._headers,
+            timeout=self.timeout,
+        ) as resp:
+            resp.raise_for_status()
+
+            async for line in resp.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+
+                chunk = orjson.loads(data)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+
+                choices = chunk.get("choices")
+                if choices:
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        yield "delta", delta
+
+        response_time_ms = int((time.time() - start_time) * 1000)
+
+        yield "done", {
+            "content": "".join(parts),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+            "response_time_ms": response_time_ms,
+            "model": self.model,
+        }
+
     async def ask_question(
         self,
         question: str,
@@ -229,85 +399,211 @@ class OpenRouterClient:
             system_prompt=system_prompt,
         )
 
+    async def parse_question(
+        self,
+        question: str,
+        system_prompt: str,
+        image_base64: Optional[str] = None,
+        context: Optional[List[dict]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ask a question expecting a structured JSON answer.
+
+        Args:
+            question: User's question
+            system_prompt: System prompt describing the JSON schema
+            image_base64: Optional base64-encoded image
+            context: Optional previous messages for context
+
+        Returns:
+            dict with response data plus 'parsed' - the decoded JSON object,
+            or None if the model's output wasn't valid JSON
+        """
+        messages = context or []
+        messages.append({"role": "user", "content": question})
+
+        response = await self.chat_completion(
+            messages=messages,
+            image_base64=image_base64,
+            system_prompt=system_prompt,
+            response_format={"type": "json_object"},
+        )
+
+        content = response["content"].strip()
+
+        # Some models wrap JSON in a Markdown fence even in JSON mode
+        if content.startswith("```"):
+            content = content.strip("`").removeprefix("json").strip()
+
+        try:
+            response["parsed"] = orjson.loads(content)
+        except ValueError:
+            logger.warning("Structured response was not valid JSON")
+            response["parsed"] = None
+
+        return response
+
 
     # Faster-Whisper for local speech-to-text transcription
     _whisper_model = None
+    _whisper_lock = threading.Lock()
 
     @classmethod
     def _get_whisper_model(cls):
-        """Lazy load Whisper model."""
+        """Lazy load Whisper model (thread-safe)."""
         if cls._whisper_model is None:
-            from faster_whisper import WhisperModel
-            logger.info("Loading Whisper model (small)...")
-            # Use "small" for balance of speed/quality on CPU
-            # Options: tiny, base, small, medium, large-v3, turbo
-            cls._whisper_model = WhisperModel("small", device="cpu", compute_type="int8")
-            logger.info("Whisper model loaded")
+            with cls._whisper_lock:
+                if cls._whisper_model is None:
+                    cls._whisper_model = cls._load_whisper_model()
         return cls._whisper_model
 
-    async def transcribe_voice(self, voice_base64: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _load_whisper_model():
+        """Load Whisper with the best device/compute type available."""
+        from faster_whisper import WhisperModel
+
+        device = "cpu"
+        compute_type = "int8"
+        try:
+            import ctranslate2
+
+            if ctranslate2.get_cuda_device_count() > 0:
+                device = "cuda"
+                compute_type = "int8_float16"
+        except Exception:
+            pass
+
+        # "small" balances speed/quality on CPU; WHISPER_MODEL switches
+        # to e.g. "turbo" where the hardware allows it. distil models
+        # are English-only and don't fit our Russian transcription.
+        model_name = settings.whisper_model
+        logger.info(f"Loading Whisper model ({model_name}, {device}/{compute_type})...")
+        if device == "cuda":
+            model = WhisperModel(model_name, device=device, compute_type=compute_type)
+        else:
+            model = WhisperModel(
+                model_name,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=os.cpu_count() or 4,
+                num_workers=2,
+            )
+        logger.info("Whisper model loaded")
+        return model
+
+    @classmethod
+    async def preload_whisper(cls) -> None:
+        """Spin up the transcription worker ahead of the first voice message.
+
+        Called at startup so neither the worker process start nor the
+        multi-second model load lands on the first user who sends a
+        voice message.
+        """
+        loop = asyncio.get_event_loop()
+        # Any task forces the worker process to start; its initializer
+        # loads the model
+        await loop.run_in_executor(_get_whisper_executor(), _noop)
+
+    async def transcribe_voice_bytes(self, audio_bytes: bytes) -> Optional[Dict[str, Any]]:
         """
-        Transcribe voice message using local Faster-Whisper.
+        Transcribe raw OGG audio using local Faster-Whisper.
+
+        The audio is fed to Whisper straight from memory - no base64
+        round trip and no temporary file on disk.
 
         Args:
-            voice_base64: Base64-encoded OGG audio
+            audio_bytes: Raw OGG audio
 
         Returns:
             Dict with 'text', 'prompt_tokens', 'completion_tokens', 'cost_usd' or None if failed
         """
-        import tempfile
-        import os
-
         start_time = time.time()
 
         try:
-            # Decode base64 to bytes
-            audio_bytes = base64.b64decode(voice_base64)
+            # Run transcription in the dedicated worker process -
+            # ctranslate2 inference is CPU-bound and would otherwise
+            # compete with the event loop for the GIL
+            loop = asyncio.get_event_loop()
+            transcription = await loop.run_in_executor(
+                _get_whisper_executor(),
+                _transcribe_worker,
+                audio_bytes,
+            )
 
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as f:
-                f.write(audio_bytes)
-                temp_path = f.name
+            response_time_ms = int((time.time() - start_time) * 1000)
+            logger.info(f"Voice transcribed in {response_time_ms}ms: {transcription[:100]}...")
 
-            try:
-                # Run transcription in thread pool (CPU-bound)
-                loop = asyncio.get_event_loop()
-                transcription = await loop.run_in_executor(
-                    None,
-                    self._transcribe_sync,
-                    temp_path,
-                )
-
-                response_time_ms = int((time.time() - start_time) * 1000)
-                logger.info(f"Voice transcribed in {response_time_ms}ms: {transcription[:100]}...")
-
-                return {
-                    "text": transcription,
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0,
-                    "cost_usd": 0.0,  # Local - free!
-                    "response_time_ms": response_time_ms,
-                }
-
-            finally:
-                # Cleanup temp file
-                os.unlink(temp_path)
+            return {
+                "text": transcription,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "cost_usd": 0.0,  # Local - free!
+                "response_time_ms": response_time_ms,
+            }
 
         except Exception as e:
             logger.error(f"Voice transcription failed: {e}")
             return None
 
-    def _transcribe_sync(self, audio_path: str) -> str:
-        """Synchronous transcription (runs in thread pool)."""
-        model = self._get_whisper_model()
-        segments, info = model.transcribe(
-            audio_path,
-            language="ru",
-            vad_filter=True,  # Remove silence
-            beam_size=5,
+    async def transcribe_voice(self, voice_base64: str) -> Optional[Dict[str, Any]]:
+        """Transcribe base64-encoded OGG audio (see transcribe_voice_bytes)."""
+        return await self.transcribe_voice_bytes(base64.b64decode(voice_base64))
+
+
+# Whisper worker process: the functions below run inside the
+# ProcessPoolExecutor worker, keeping inference (and the model itself)
+# completely out of the bot process.
+_whisper_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_whisper_executor() -> ProcessPoolExecutor:
+    """Get or create the single-worker transcription process pool."""
+    global _whisper_executor
+    if _whisper_executor is None:
+        _whisper_executor = ProcessPoolExecutor(
+            max_workers=1,
+            initializer=_init_whisper_worker,
         )
-        return " ".join([segment.text.strip() for segment in segments])
+    return _whisper_executor
+
+
+def shutdown_whisper_executor() -> None:
+    """Shut down the transcription worker process, if started."""
+    global _whisper_executor
+    if _whisper_executor is not None:
+        _whisper_executor.shutdown(wait=False)
+        _whisper_executor = None
+
+
+def _init_whisper_worker() -> None:
+    """Load the Whisper model inside the worker process."""
+    OpenRouterClient._get_whisper_model()
+
+
+def _noop() -> None:
+    """No-op task used to force worker process startup."""
+
+
+def _transcribe_worker(audio_bytes: bytes) -> str:
+    """Transcribe raw OGG audio (runs in the worker process)."""
+    import io
+
+    model = OpenRouterClient._get_whisper_model()
+    segments, info = model.transcribe(
+        io.BytesIO(audio_bytes),
+        language="ru",
+        vad_filter=True,  # Remove silence
+        vad_parameters={"min_silence_duration_ms": 500},
+        # Greedy decoding: short voice notes lose nothing noticeable
+        # versus beam search but decode several times faster
+        beam_size=settings.whisper_beam_size,
+        best_of=1,
+        # Voice notes are single utterances - cross-segment
+        # conditioning only adds work and hallucination risk
+        condition_on_previous_text=False,
+    )
+    return " ".join([segment.text.strip() for segment in segments])
 
 
 # Global client instance
@@ -2,12 +2,13 @@
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.config import settings
 from bot.database.models import PackageType, Payment, PaymentProvider, PaymentStatus
+from bot.services._cache import invalidate_user, profile_cache
 from bot.database.repositories import (
     PaymentRepository,
     SubscriptionRepository,
@@ -15,7 +16,7 @@ from bot.database.repositories import (
 )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Package:
     """Package information for purchase."""
 
@@ -25,11 +26,56 @@ class Package:
     price_stars: int
     price_rub: int  # In kopecks
     is_subscription: bool = False
-
-    @property
-    def price_rub_display(self) -> str:
-        """Get price in rubles for display."""
-        return f"{self.price_rub / 100:.0f}"
+    # Derived strings, filled in __post_init__
+    price_rub_display: str = ""  # Whole rubles, for UI
+    price_rub_value: str = ""  # "NNN.NN" rubles, for YooKassa amounts
+
+    def __post_init__(self) -> None:
+        # Instances are frozen and long-lived, so format the ruble
+        # strings once instead of on every render/invoice
+        object.__setattr__(self, "price_rub_display", f"{self.price_rub // 100}")
+        object.__setattr__(self, "price_rub_value", f"{self.price_rub / 100:.2f}")
+
+
+def _build_packages() -> Tuple[Package, ...]:
+    """Build the package catalog from current settings."""
+    return (
+        Package(
+            type=PackageType.REQUESTS_50,
+            name="50 запросов",
+            requests=50,
+            price_stars=settings.price_50_requests_stars,
+            price_rub=settings.price_50_requests_rub,
+        ),
+        Package(
+            type=PackageType.REQUESTS_100,
+            name="100 запросов",
+            requests=100,
+            price_stars=settings.price_100_requests_stars,
+            price_rub=settings.price_100_requests_rub,
+        ),
+        Package(
+            type=PackageType.SUBSCRIPTION,
+            name="Безлимит на месяц",
+            requests=0,  # Unlimited
+            price_stars=settings.price_subscription_stars,
+            price_rub=settings.price_subscription_rub,
+            is_subscription=True,
+        ),
+    )
+
+
+# Prices only change via settings, so the catalog is built once at
+# import and lookups are dictionary hits
+_PACKAGES: Tuple[Package, ...] = _build_packages()
+_PACKAGES_BY_TYPE: Dict[PackageType, Package] = {p.type: p for p in _PACKAGES}
+
+
+def refresh_packages() -> None:
+    """Rebuild the package catalog after settings change."""
+    global _PACKAGES, _PACKAGES_BY_TYPE
+    _PACKAGES = _build_packages()
+    _PACKAGES_BY_TYPE = {p.type: p for p in _PACKAGES}
 
 
 class PaymentService:
@@ -42,41 +88,14 @@ class PaymentService:
         self.subscription_repo = SubscriptionRepository(session)
 
     @staticmethod
-    def get_packages() -> List[Package]:
-        """Get list of available packages."""
-        return [
-            Package(
-                type=PackageType.REQUESTS_50,
-                name="50 запросов",
-                requests=50,
-                price_stars=settings.price_50_requests_stars,
-                price_rub=settings.price_50_requests_rub,
-            ),
-            Package(
-                type=PackageType.REQUESTS_100,
-                name="100 запросов",
-                requests=100,
-                price_stars=settings.price_100_requests_stars,
-                price_rub=settings.price_100_requests_rub,
-            ),
-            Package(
-                type=PackageType.SUBSCRIPTION,
-                name="Безлимит на месяц",
-                requests=0,  # Unlimited
-                price_stars=settings.price_subscription_stars,
-                price_rub=settings.price_subscription_rub,
-                is_subscription=True,
-            ),
-        ]
+    def get_packages() -> Tuple[Package, ...]:
+        """Get available packages."""
+        return _PACKAGES
 
     @staticmethod
     def get_package_by_type(package_type: PackageType) -> Optional[Package]:
         """Get package by its type."""
-        packages = PaymentService.get_packages()
-        for package in packages:
-            if package.type == package_type:
-                return package
-        return None
+        return _PACKAGES_BY_TYPE.get(package_type)
 
     async def create_payment(
         self,
@@ -84,13 +103,15 @@ class PaymentService:
         package_type: PackageType,
         provider: PaymentProvider,
         provider_payment_id: Optional[str] = None,
+        package: Optional[Package] = None,
     ) -> Optional[Payment]:
-        """Create a new payment record."""
-        user = await self.user_repo.get_by_telegram_id(telegram_id)
-        if not user:
-            return None
+        """Create a new payment record.
 
-        package = self.get_package_by_type(package_type)
+        Callers that already resolved the package can pass it to skip
+        the repeated catalog lookup.
+        """
+        if package is None:
+            package = self.get_package_by_type(package_type)
         if not package:
             return None
 
@@ -102,8 +123,10 @@ class PaymentService:
             amount = package.price_rub
             currency = "RUB"
 
-        payment = await self.payment_repo.create(
-            user_id=user.id,
+        # One INSERT..FROM SELECT resolves the user and inserts the
+        # payment; None comes back when the user doesn't exist
+        payment = await self.payment_repo.create_for_telegram_id(
+            telegram_id=telegram_id,
             amount=amount,
             currency=currency,
             provider=provider,
@@ -111,6 +134,8 @@ class PaymentService:
             requests_amount=package.requests,
             provider_payment_id=provider_payment_id,
         )
+        if payment is None:
+            return None
 
         await self.session.commit()
         return payment
@@ -121,81 +146,106 @@ class PaymentService:
         telegram_payment_charge_id: Optional[str] = None,
     ) -> bool:
         """Process a successful payment - add requests or subscription."""
-        payment = await self.payment_repo.get_by_id(payment_id)
-        if not payment or payment.status == PaymentStatus.SUCCEEDED:
-            return False
-
-        # Update payment status
-        await self.payment_repo.update_status(
+        # One guarded UPDATE flips the status and hands back the
+        # crediting columns; an already-SUCCEEDED payment matches no
+        # row, so duplicate webhooks can never credit twice
+        row = await self.payment_repo.mark_status_returning(
             payment_id=payment_id,
             status=PaymentStatus.SUCCEEDED,
             telegram_payment_charge_id=telegram_payment_charge_id,
         )
+        if row is None:
+            return False
+        package_type, user_id, _ = row
 
-        package = self.get_package_by_type(payment.package_type)
+        package = self.get_package_by_type(package_type)
         if not package:
             return False
 
         if package.is_subscription:
             # Create or extend subscription
-            existing_sub = await self.subscription_repo.get_active(payment.user_id)
+            existing_sub = await self.subscription_repo.get_active(user_id)
             if existing_sub:
-                await self.subscription_repo.extend_subscription(payment.user_id, 30)
+                existing_sub.expires_at = existing_sub.expires_at + timedelta(days=30)
             else:
                 expires_at = datetime.utcnow() + timedelta(days=30)
                 await self.subscription_repo.create(
-                    user_id=payment.user_id,
+                    user_id=user_id,
                     expires_at=expires_at,
                     payment_id=payment_id,
                 )
         else:
             # Add bonus requests
-            await self.user_repo.add_bonus_requests(
-                payment.user_id, package.requests
-            )
+            await self.user_repo.add_bonus_requests(user_id, package.requests)
 
         await self.session.commit()
+
+        # Drop cached profile data so the purchase shows up immediately
+        user = await self.user_repo.get_by_id(user_id)
+        if user:
+            invalidate_user(user.telegram_id)
+
         return True
 
     async def process_failed_payment(self, payment_id: int) -> bool:
         """Mark payment as failed."""
-        payment = await self.payment_repo.get_by_id(payment_id)
-        if not payment:
-            return False
-
-        await self.payment_repo.update_status(
+        row = await self.payment_repo.mark_status_returning(
             payment_id=payment_id,
             status=PaymentStatus.FAILED,
         )
+        if row is None:
+            return False
+
         await self.session.commit()
         return True
 
-    async def get_user_subscription(self, telegram_id: int) -> Optional[datetime]:
-        """Get user's subscription expiration date if active."""
+    async def _get_profile_cached(self, telegram_id: int) -> Tuple[int, Optional[datetime]]:
+        """Get (bonus_requests, subscription expiry) with a 30s cache.
+
+        Used by display-only paths; limit enforcement reads the
+        database directly.
+        """
+        cached = profile_cache.get(telegram_id)
+        if cached is not None:
+            return cached
+
         user = await self.user_repo.get_by_telegram_id(telegram_id)
         if not user:
-            return None
+            value = (0, None)
+        else:
+            subscription = await self.subscription_repo.get_active(user.id)
+            value = (
+                user.bonus_requests,
+                subscription.expires_at if subscription else None,
+            )
+
+        profile_cache[telegram_id] = value
+        return value
 
-        subscription = await self.subscription_repo.get_active(user.id)
-        if subscription:
-            return subscription.expires_at
-        return None
+    async def get_profile_bundle(
+        self, telegram_id: int
+    ) -> Tuple[int, Optional[datetime]]:
+        """Get (bonus_requests, subscription expiry) in one lookup.
+
+        Callers rendering a profile should use this instead of the
+        single-field getters to avoid two sequential awaits.
+        """
+        return await self._get_profile_cached(telegram_id)
+
+    async def get_user_subscription(self, telegram_id: int) -> Optional[datetime]:
+        """Get user's subscription expiration date if active."""
+        _, expires_at = await self._get_profile_cached(telegram_id)
+        return expires_at
 
     async def get_user_bonus_requests(self, telegram_id: int) -> int:
         """Get user's bonus requests count."""
-        user = await self.user_repo.get_by_telegram_id(telegram_id)
-        if not user:
-            return 0
-        return user.bonus_requests
+        bonus_requests, _ = await self._get_profile_cached(telegram_id)
+        return bonus_requests
 
     async def has_active_subscription(self, telegram_id: int) -> bool:
         """Check if user has active subscription."""
-        user = await self.user_repo.get_by_telegram_id(telegram_id)
-        if not user:
-            return False
-
-        subscription = await self.subscription_repo.get_active(user.id)
-        return subscription is not None
+        _, expires_at = await self._get_profile_cached(telegram_id)
+        return expires_at is not None
 
     async def get_payment_by_provider_id(
         self, provider_payment_id: str
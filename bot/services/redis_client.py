@@ -0,0 +1,25 @@
+"""Shared Redis client for storage helpers and caches."""
+
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from bot.config import settings
+
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Get or create the shared Redis client."""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.redis_url)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client."""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
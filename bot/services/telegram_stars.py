@@ -9,6 +9,17 @@ from bot.database.models import PackageType, PaymentProvider
 from bot.services.payment_service import PaymentService
 
 
+def _parse_payment_payload(payload: str) -> Optional[int]:
+    """Extract the payment id from a "payment:<id>" invoice payload."""
+    prefix, sep, payment_id = payload.partition(":")
+    if not sep or prefix != "payment":
+        return None
+    try:
+        return int(payment_id)
+    except ValueError:
+        return None
+
+
 class TelegramStarsService:
     """Service for Telegram Stars payments."""
 
@@ -36,6 +47,7 @@ class TelegramStarsService:
             telegram_id=telegram_id,
             package_type=package_type,
             provider=PaymentProvider.TELEGRAM_STARS,
+            package=package,
         )
 
         if not payment:
@@ -78,23 +90,14 @@ class TelegramStarsService:
         Returns True if payment can proceed, False otherwise.
         """
         # Extract payment_id from payload
-        payload = pre_checkout_query.invoice_payload
-        if not payload.startswith("payment:"):
+        payment_id = _parse_payment_payload(pre_checkout_query.invoice_payload)
+        if payment_id is None:
             await pre_checkout_query.answer(
                 ok=False,
                 error_message="Invalid payment data",
             )
             return False
 
-        try:
-            payment_id = int(payload.split(":")[1])
-        except (ValueError, IndexError):
-            await pre_checkout_query.answer(
-                ok=False,
-                error_message="Invalid payment ID",
-            )
-            return False
-
         # Verify payment exists and is pending
         payment = await self.payment_service.payment_repo.get_by_id(payment_id)
         if not payment:
@@ -117,13 +120,8 @@ class TelegramStarsService:
         Returns True if payment was processed successfully.
         """
         # Extract payment_id from payload
-        payload = successful_payment.invoice_payload
-        if not payload.startswith("payment:"):
-            return False
-
-        try:
-            payment_id = int(payload.split(":")[1])
-        except (ValueError, IndexError):
+        payment_id = _parse_payment_payload(successful_payment.invoice_payload)
+        if payment_id is None:
             return False
 
         # Process the payment
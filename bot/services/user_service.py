@@ -7,6 +7,7 @@ from zoneinfo import ZoneInfo
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.config import settings
+from bot.services._cache import invalidate_user
 from bot.database.repositories import (
     RequestRepository,
     SubscriptionRepository,
@@ -17,6 +18,11 @@ from bot.database.repositories import (
 MSK = ZoneInfo("Europe/Moscow")
 
 
+def _today_msk() -> date:
+    """Current date in Moscow (daily limits roll at MSK midnight)."""
+    return datetime.now(MSK).date()
+
+
 class UserService:
     """Service for user-related business logic."""
 
@@ -53,7 +59,10 @@ class UserService:
             tuple(can_request, error_message, request_type)
             request_type: "subscription", "bonus", "daily"
         """
-        user = await self.user_repo.get_by_telegram_id(telegram_id)
+        # User and active subscription come back from one joined query
+        user, sub_expires_at = await self.user_repo.get_with_active_subscription(
+            telegram_id
+        )
 
         if not user:
             return False, "Пользователь не найден", ""
@@ -61,22 +70,18 @@ class UserService:
         if user.is_banned:
             return False, "🚫 Твой аккаунт заблокирован. Обратись в поддержку.", ""
 
-        # Check if daily requests need reset (Moscow midnight)
-        await self._check_daily_reset(user)
-
         # 1. Check active subscription - unlimited access
-        subscription = await self.subscription_repo.get_active(user.id)
-        if subscription:
+        if sub_expires_at:
             return True, "", "subscription"
 
         # 2. Check bonus requests
         if user.bonus_requests > 0:
             return True, "", "bonus"
 
-        # 3. Check daily limit
+        # 3. Check daily limit (reset computed lazily - no write)
         limit = user.custom_daily_limit or settings.daily_request_limit
 
-        if user.daily_requests >= limit:
+        if self.effective_daily_requests(user) >= limit:
             return (
                 False,
                 f"⏳ Ты использовал все запросы на сегодня ({limit}/{limit}). "
@@ -87,18 +92,20 @@ class UserService:
 
         return True, "", "daily"
 
-    async def _check_daily_reset(self, user) -> None:
-        """Reset daily requests if it's a new day in Moscow."""
-        now_msk = datetime.now(MSK)
-        today_msk = now_msk.date()
+    @staticmethod
+    def effective_daily_requests(user) -> int:
+        """Daily counter adjusted for a day roll that isn't persisted yet.
 
-        if user.last_request_date:
-            # Convert last request date to Moscow timezone
-            last_date_msk = user.last_request_date.date()
-
-            if last_date_msk < today_msk:
-                user.daily_requests = 0
-                await self.session.commit()
+        The stored counter only resets when the user actually makes a
+        request, so reads interpret it against last_reset_date instead
+        of writing a reset back on every check.
+        """
+        last = user.last_reset_date or (
+            user.last_request_date.date() if user.last_request_date else None
+        )
+        if last is None or last < _today_msk():
+            return 0
+        return user.daily_requests
 
     async def increment_usage(
         self,
@@ -121,28 +128,21 @@ class UserService:
         cost_usd: float = 0.0,
     ) -> Optional[int]:
         """Increment user's usage counters and save request. Returns request ID."""
-        user = await self.user_repo.get_by_telegram_id(telegram_id)
-        if not user:
+        # All counter updates collapse into one UPDATE that also
+        # resolves the user's database id
+        user_id = await self.user_repo.apply_usage(
+            telegram_id,
+            tokens=total_all_tokens if total_all_tokens > 0 else tokens,
+            cost_usd=cost_usd,
+            request_type=request_type,
+            today=_today_msk(),
+        )
+        if user_id is None:
             return None
 
-        # Handle different request types
-        if request_type == "bonus":
-            # Use bonus request
-            await self.user_repo.use_bonus_request(user.id)
-        elif request_type == "daily":
-            # Increment daily counters
-            await self.user_repo.increment_requests(user.id, tokens)
-        # For subscription, we don't decrement anything
-
-        # Always increment total counters and tokens
-        user.total_requests += 1
-        user.total_tokens += total_all_tokens if total_all_tokens > 0 else tokens
-        user.total_cost_usd += cost_usd
-        user.last_request_date = datetime.utcnow()
-
         # Save request record
         request = await self.request_repo.create(
-            user_id=user.id,
+            user_id=user_id,
             question=question,
             answer=answer,
             model_used=model,
@@ -161,24 +161,24 @@ class UserService:
         )
 
         await self.session.commit()
+
+        # Bonus balance may have changed - drop the cached profile data
+        if request_type == "bonus":
+            invalidate_user(telegram_id)
+
         return request.id
 
     async def get_user_stats(self, telegram_id: int) -> Optional[dict]:
         """Get user statistics for profile display."""
-        user = await self.user_repo.get_by_telegram_id(telegram_id)
+        # User row and favorite subject come back from one query
+        user, favorite_subject = await self.user_repo.get_stats_bundle(telegram_id)
         if not user:
             return None
 
-        # Check daily reset
-        await self._check_daily_reset(user)
-
-        # Get favorite subject
-        favorite_subject = await self.request_repo.get_user_favorite_subject(user.id)
-
         limit = user.custom_daily_limit or settings.daily_request_limit
 
         return {
-            "daily_requests": user.daily_requests,
+            "daily_requests": self.effective_daily_requests(user),
             "daily_limit": limit,
             "bonus_requests": user.bonus_requests,
             "total_requests": user.total_requests,
@@ -0,0 +1,135 @@
+"""Batching layer for YooKassa webhook processing."""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from bot.database import async_session
+from bot.services.payment_service import PaymentService
+
+logger = logging.getLogger(__name__)
+
+_MAX_BATCH_SIZE = 64
+_MAX_QUEUE_TIME = 0.05  # Coalescing window in seconds
+
+
+class PaymentWebhookBatcher:
+    """Coalesce bursts of YooKassa webhooks into batched DB work.
+
+    Webhooks submitted within a short window are processed together on
+    one session: a single SELECT with provider_payment_id IN (...)
+    resolves every affected payment instead of one query per event.
+    Built on a plain asyncio queue plus per-event futures, so callers
+    still get an individual success/failure result.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = _MAX_BATCH_SIZE,
+        max_queue_time: float = _MAX_QUEUE_TIME,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, webhook_data: Dict[str, Any]) -> bool:
+        """Queue a webhook and wait for its batched processing result."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((webhook_data, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self) -> None:
+        """Drain the queue in batches until it goes idle."""
+        loop = asyncio.get_running_loop()
+        while not self._queue.empty():
+            batch: List[Tuple[Dict[str, Any], asyncio.Future]] = [
+                self._queue.get_nowait()
+            ]
+            # Wait out the coalescing window to pick up late arrivals
+            deadline = loop.time() + self.max_queue_time
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._process_batch(batch)
+            except Exception:
+                # Fail this batch but keep the worker alive - dying
+                # here would leave already-queued webhooks awaiting
+                # their futures forever
+                logger.exception("Webhook batch processing failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(False)
+
+    async def _process_batch(
+        self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]
+    ) -> None:
+        """Process one batch of webhooks on a shared session."""
+        async with async_session() as session:
+            payment_service = PaymentService(session)
+
+            # One SELECT resolves every payment referenced by the batch
+            provider_ids = {
+                event.get("object", {}).get("id")
+                for event, _ in batch
+                if event.get("object", {}).get("id")
+            }
+            payments = await payment_service.payment_repo.get_by_provider_ids(
+                list(provider_ids)
+            )
+            by_provider_id = {p.provider_payment_id: p for p in payments}
+
+            for event, future in batch:
+                try:
+                    result = await self._process_event(
+                        payment_service, by_provider_id, event
+                    )
+                except Exception:
+                    result = False
+                if not future.done():
+                    future.set_result(result)
+
+    @staticmethod
+    async def _process_event(
+        payment_service: PaymentService,
+        by_provider_id: Dict[str, Any],
+        webhook_data: Dict[str, Any],
+    ) -> bool:
+        """Apply a single webhook event using the prefetched payments."""
+        event = webhook_data.get("event")
+        payment_object = webhook_data.get("object", {})
+        if event not in ("payment.succeeded", "payment.canceled"):
+            # Unknown event - just acknowledge
+            return True
+
+        payment = by_provider_id.get(payment_object.get("id"))
+        if not payment and event == "payment.succeeded":
+            # Fall back to the payment id embedded in our metadata
+            payment_id = payment_object.get("metadata", {}).get("payment_id")
+            if payment_id:
+                payment = await payment_service.payment_repo.get_by_id(
+                    int(payment_id)
+                )
+        if not payment:
+            return False
+
+        if event == "payment.succeeded":
+            return await payment_service.process_successful_payment(
+                payment_id=payment.id
+            )
+        return await payment_service.process_failed_payment(payment.id)
+
+
+# Module-level batcher shared by all webhook requests
+payment_webhook_batcher = PaymentWebhookBatcher()
@@ -1,16 +1,58 @@
 """YooKassa payment service."""
 
+import asyncio
 import hashlib
 import hmac
-import uuid
+import logging
+import os
 from typing import Any, Dict, Optional
 
 import aiohttp
+import orjson
 
 from bot.config import settings
 from bot.database.models import PackageType, PaymentProvider, PaymentStatus
 from bot.services.payment_service import PaymentService
 
+logger = logging.getLogger(__name__)
+
+# Shared aiohttp session for YooKassa calls: keep-alive connections
+# and cached DNS instead of a fresh TLS handshake per payment
+_yookassa_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Get or create the module-wide YooKassa session."""
+    global _yookassa_session
+    if _yookassa_session is None or _yookassa_session.closed:
+        _yookassa_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            ),
+            json_serialize=lambda value: orjson.dumps(value).decode(),
+        )
+    return _yookassa_session
+
+
+async def close_yookassa_session() -> None:
+    """Close the module-wide YooKassa session."""
+    global _yookassa_session
+    if _yookassa_session and not _yookassa_session.closed:
+        await _yookassa_session.close()
+    _yookassa_session = None
+
+
+# Static parts of the create-payment body; copied and filled per call
+_PAYMENT_TEMPLATE: Dict[str, Any] = {
+    "amount": None,
+    "confirmation": None,
+    "capture": True,
+    "description": None,
+    "metadata": None,
+}
+
 
 class YooKassaService:
     """Service for YooKassa payments."""
@@ -46,63 +88,63 @@ class YooKassaService:
             telegram_id=telegram_id,
             package_type=package_type,
             provider=PaymentProvider.YOOKASSA,
+            package=package,
         )
 
         if not payment:
             return None
 
-        # Generate idempotence key
-        idempotence_key = str(uuid.uuid4())
+        # Generate idempotence key (YooKassa only needs uniqueness,
+        # so 16 random bytes beat the UUID formatting machinery)
+        idempotence_key = os.urandom(16).hex()
 
         # Prepare payment data for YooKassa
-        payment_data = {
-            "amount": {
-                "value": f"{package.price_rub / 100:.2f}",  # Convert kopecks to rubles
-                "currency": "RUB",
-            },
-            "confirmation": {
-                "type": "redirect",
-                "return_url": return_url,
-            },
-            "capture": True,
-            "description": f"Покупка: {package.name}",
-            "metadata": {
-                "payment_id": payment.id,
-                "telegram_id": telegram_id,
-                "package_type": package_type.value,
-            },
+        payment_data = _PAYMENT_TEMPLATE.copy()
+        payment_data["amount"] = {
+            "value": package.price_rub_value,  # Rubles, precomputed on the package
+            "currency": "RUB",
+        }
+        payment_data["confirmation"] = {
+            "type": "redirect",
+            "return_url": return_url,
+        }
+        payment_data["description"] = f"Покупка: {package.name}"
+        payment_data["metadata"] = {
+            "payment_id": payment.id,
+            "telegram_id": telegram_id,
+            "package_type": package_type.value,
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.API_URL}/payments",
-                    json=payment_data,
-                    auth=self._get_auth(),
-                    headers={
-                        "Idempotence-Key": idempotence_key,
-                        "Content-Type": "application/json",
-                    },
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        print(f"YooKassa error: {error_text}")
-                        return None
-
-                    result = await response.json()
-
-                    # Update payment with YooKassa payment ID
-                    payment.provider_payment_id = result.get("id")
-                    await self.payment_service.session.commit()
-
-                    return {
-                        "payment_url": result["confirmation"]["confirmation_url"],
-                        "payment_id": payment.id,
-                        "yookassa_payment_id": result["id"],
-                    }
-
-        except aiohttp.ClientError as e:
-            print(f"YooKassa request error: {e}")
+            session = _get_session()
+            async with session.post(
+                f"{self.API_URL}/payments",
+                json=payment_data,
+                auth=self._get_auth(),
+                headers={
+                    "Idempotence-Key": idempotence_key,
+                    "Content-Type": "application/json",
+                },
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error("YooKassa error: %s", error_text)
+                    return None
+
+                result = orjson.loads(await response.read())
+
+                # Update payment with YooKassa payment ID
+                payment.provider_payment_id = result.get("id")
+                await self.payment_service.session.commit()
+
+                return {
+                    "payment_url": result["confirmation"]["confirmation_url"],
+                    "payment_id": payment.id,
+                    "yookassa_payment_id": result["id"],
+                }
+
+        except aiohttp.ClientError:
+            logger.exception("YooKassa request error")
             return None
 
     async def handle_webhook(self, webhook_data: Dict[str, Any]) -> bool:
@@ -169,21 +211,50 @@ class YooKassaService:
 
         return await self.payment_service.process_failed_payment(payment.id)
 
+    async def poll_until_final(
+        self,
+        yookassa_payment_id: str,
+        timeout: float = 600.0,
+    ) -> Optional[str]:
+        """
+        Poll YooKassa until the payment reaches a final status.
+
+        Uses an adaptive schedule: short intervals at first (most
+        payments confirm within the first minute), backing off towards
+        a 60s cap for stragglers. Returns the final status, or the
+        last observed status (possibly None) when timeout runs out.
+        """
+        delay = 2.0
+        deadline = asyncio.get_running_loop().time() + timeout
+        status: Optional[str] = None
+
+        while True:
+            status = await self.get_payment_status(yookassa_payment_id)
+            if status in ("succeeded", "canceled"):
+                return status
+
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return status
+
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 1.5, 60.0)
+
     async def get_payment_status(
         self, yookassa_payment_id: str
     ) -> Optional[str]:
         """Get payment status from YooKassa."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.API_URL}/payments/{yookassa_payment_id}",
-                    auth=self._get_auth(),
-                ) as response:
-                    if response.status != 200:
-                        return None
+            session = _get_session()
+            async with session.get(
+                f"{self.API_URL}/payments/{yookassa_payment_id}",
+                auth=self._get_auth(),
+            ) as response:
+                if response.status != 200:
+                    return None
 
-                    result = await response.json()
-                    return result.get("status")
+                result = orjson.loads(await response.read())
+                return result.get("status")
 
         except aiohttp.ClientError:
             return None
@@ -200,9 +271,13 @@ class YooKassaService:
         Note: YooKassa webhooks typically use IP whitelisting,
         but this method can be used for additional security.
         """
-        expected_signature = hmac.new(
+        try:
+            provided = bytes.fromhex(signature)
+        except ValueError:
+            return False
+        expected = hmac.new(
             secret.encode(),
             body,
             hashlib.sha256,
-        ).hexdigest()
-        return hmac.compare_digest(expected_signature, signature)
+        ).digest()
+        return hmac.compare_digest(expected, provided)
@@ -46,6 +46,31 @@ INTERVIEW_PROMPT = """Проанализируй задачу пользоват
 [ВАРИАНТЫ: Школьный (базовый) | Углублённый | Вузовский]"
 """
 
+INTERVIEW_PLAN_PROMPT = """Проанализируй задачу пользователя.
+
+Если для решения не хватает данных, неясен уровень сложности (школа/вуз)
+или возможны разные интерпретации — задай 1-2 уточняющих вопроса.
+Если задача полная и понятная — сразу составь краткий план решения
+(3-5 пунктов, каждый пункт — одно предложение, без самого решения).
+
+Ответь строго JSON-объектом без пояснений:
+{
+  "interview": "уточняющий вопрос или null",
+  "options": ["вариант1", "вариант2"] или null,
+  "plan": "план решения или null"
+}
+
+Заполни либо interview (с опциональными options), либо plan — не оба сразу.
+
+Формат plan:
+📋 **План решения:**
+
+1. [первый шаг]
+2. [второй шаг]
+3. [третий шаг]
+...
+"""
+
 PLAN_PROMPT = """Составь краткий план решения задачи (3-5 пунктов).
 Каждый пункт — одно предложение.
 Не решай задачу, только план.
@@ -1,27 +1,105 @@
 """Text utilities for message processing."""
 
 import re
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
 
+# Patterns are compiled once at import instead of per call
+_SUBJECT_RE = re.compile(r"\[SUBJECT:\s*([^\]]+)\]")
+_SUBJECT_STRIP_RE = re.compile(r"\n?\[SUBJECT:[^\]]+\]")
+_OPTIONS_RE = re.compile(r"\[ВАРИАНТЫ:\s*([^\]]+)\]")
 
-def split_message(text: str, max_length: int = 4096) -> List[str]:
+# Sentence terminators for the manual sentence scanner
+_SENT_END = frozenset(".!?")
+
+
+def _iter_sentences(para: str) -> Iterator[str]:
+    """Yield sentences of a paragraph one at a time.
+
+    A sentence ends at a '.', '!' or '?' followed by whitespace (or
+    the end of the paragraph), matching the old (?<=[.!?])\\s+ split
+    but without materializing the whole sentence list up front.
     """
-    Split long message into chunks for Telegram.
+    i = 0
+    n = len(para)
+    sent_end = _SENT_END  # Local binding: this loop runs per character
+    while i < n:
+        j = i
+        while j < n:
+            if para[j] in sent_end and (j + 1 >= n or para[j + 1].isspace()):
+                break
+            j += 1
+        # Swallow the whitespace run that separated the sentences
+        k = j + 1
+        while k < n and para[k].isspace():
+            k += 1
+        yield para[i:j + 1] if j < n else para[i:n]
+        i = k
+
+# Markdown markers, longest alternatives first so ``` wins over `
+_MD_TOKENS = re.compile(r"```|\*\*|`|\*")
+
+# Characters that need escaping in Telegram Markdown
+_ESCAPE_TABLE = str.maketrans({
+    "_": "\\_",
+    "*": "\\*",
+    "`": "\\`",
+    "[": "\\[",
+})
+
+
+def iter_split_message(text: str, max_length: int = 4096) -> Iterator[str]:
+    """
+    Lazily split a long message into chunks for Telegram.
 
     Tries to split at paragraph boundaries, then sentences, then words.
+    Chunks are yielded as they fill, so callers can start sending the
+    first one before the rest of the text is processed.
 
     Args:
         text: Text to split
         max_length: Maximum length of each chunk (Telegram limit is 4096)
 
-    Returns:
-        List of text chunks
+    Yields:
+        Text chunks
     """
     if len(text) <= max_length:
-        return [text]
-
-    chunks = []
-    current_chunk = ""
+        yield text
+        return
+
+    # Second-most-common shape: slightly over the limit with a clean
+    # paragraph break - split once and skip the general machinery
+    if len(text) <= 2 * max_length:
+        cut = text.rfind("\n\n", 0, max_length)
+        if cut > 0 and len(text) - cut - 2 <= max_length:
+            yield text[:cut].rstrip()
+            yield text[cut + 2:].lstrip()
+            return
+
+    # Accumulate fragments in a list and join on flush: repeated
+    # string += copies the whole chunk on every append
+    parts: List[str] = []
+    parts_append = parts.append  # Bound methods: called once per fragment
+    parts_clear = parts.clear
+    length = 0
+
+    def flush() -> Iterator[str]:
+        nonlocal length
+        if parts:
+            # Separators are only ever appended between fragments, so
+            # the join needs no strip() copy of the finished chunk
+            chunk = "".join(parts)
+            parts_clear()
+            length = 0
+            yield chunk
+
+    def append(fragment: str, sep: str) -> None:
+        nonlocal length
+        if parts:
+            parts_append(sep)
+            length += len(sep)
+        parts_append(fragment)
+        length += len(fragment)
 
     # Try to split by paragraphs first
     paragraphs = text.split("\n\n")
@@ -30,37 +108,54 @@ def split_message(text: str, max_length: int = 4096) -> List[str]:
         # If single paragraph is too long, split it further
         if len(para) > max_length:
             # Split by sentences
-            sentences = re.split(r"(?<=[.!?])\s+", para)
-            for sentence in sentences:
+            for sentence in _iter_sentences(para):
                 if len(sentence) > max_length:
-                    # Split by words as last resort
-                    words = sentence.split()
-                    for word in words:
-                        if len(current_chunk) + len(word) + 1 > max_length:
-                            if current_chunk:
-                                chunks.append(current_chunk.strip())
-                            current_chunk = word
+                    # Last resort: cut at the last space inside each
+                    # window instead of re-splitting into words
+                    yield from flush()
+                    start = 0
+                    sentence_len = len(sentence)
+                    while sentence_len - start > max_length:
+                        cut = sentence.rfind(" ", start, start + max_length + 1)
+                        if cut <= start:
+                            # No space in the window - hard cut
+                            cut = start + max_length
+                            yield sentence[start:cut].strip()
+                            start = cut
                         else:
-                            current_chunk += " " + word if current_chunk else word
-                elif len(current_chunk) + len(sentence) + 1 > max_length:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = sentence
+                            yield sentence[start:cut].strip()
+                            start = cut + 1
+                    append(sentence[start:], " ")
                 else:
-                    current_chunk += " " + sentence if current_chunk else sentence
-        elif len(current_chunk) + len(para) + 2 > max_length:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = para
+                    if length + len(sentence) + 1 > max_length:
+                        yield from flush()
+                    append(sentence, " ")
         else:
-            current_chunk += "\n\n" + para if current_chunk else para
+            if length + len(para) + 2 > max_length:
+                yield from flush()
+            append(para, "\n\n")
+
+    yield from flush()
+
+
+def split_message(text: str, max_length: int = 4096) -> List[str]:
+    """
+    Split long message into chunks for Telegram.
 
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    Eager wrapper around iter_split_message for callers that need the
+    full list (e.g. to count chunks up front).
+
+    Args:
+        text: Text to split
+        max_length: Maximum length of each chunk (Telegram limit is 4096)
 
-    return chunks
+    Returns:
+        List of text chunks
+    """
+    return list(iter_split_message(text, max_length))
 
 
+@lru_cache(maxsize=256)
 def extract_subject(text: str) -> Optional[str]:
     """
     Extract subject tag from AI response.
@@ -73,15 +168,42 @@ def extract_subject(text: str) -> Optional[str]:
     Returns:
         Subject name or None if not found
     """
-    match = re.search(r"\[SUBJECT:\s*([^\]]+)\]", text)
+    # Most responses carry no tag - skip the regex entirely then
+    if "[SUBJECT:" not in text:
+        return None
+    match = _SUBJECT_RE.search(text)
     if match:
         return match.group(1).strip()
     return None
 
 
+@lru_cache(maxsize=256)
 def remove_subject_tag(text: str) -> str:
     """Remove subject tag from text."""
-    return re.sub(r"\n?\[SUBJECT:[^\]]+\]", "", text).strip()
+    if "[SUBJECT:" not in text:
+        return text.strip()
+    return _SUBJECT_STRIP_RE.sub("", text).strip()
+
+
+@lru_cache(maxsize=256)
+def _extract_interview_options_cached(
+    text: str,
+) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    """Cached core of extract_interview_options (immutable options)."""
+    if "[ВАРИАНТЫ:" not in text:
+        return text, None
+    match = _OPTIONS_RE.search(text)
+    if match:
+        options_str = match.group(1)
+        options = tuple(opt.strip() for opt in options_str.split("|"))
+        # The match already knows where the tag sits - slice it out
+        # instead of running a second regex over the text
+        start, end = match.span()
+        if start > 0 and text[start - 1] == "\n":
+            start -= 1
+        clean_text = (text[:start] + text[end:]).strip()
+        return clean_text, options
+    return text, None
 
 
 def extract_interview_options(text: str) -> Tuple[str, Optional[List[str]]]:
@@ -96,38 +218,74 @@ def extract_interview_options(text: str) -> Tuple[str, Optional[List[str]]]:
     Returns:
         tuple(clean_text, options_list or None)
     """
-    match = re.search(r"\[ВАРИАНТЫ:\s*([^\]]+)\]", text)
-    if match:
-        options_str = match.group(1)
-        options = [opt.strip() for opt in options_str.split("|")]
-        clean_text = re.sub(r"\n?\[ВАРИАНТЫ:[^\]]+\]", "", text).strip()
-        return clean_text, options
-    return text, None
+    clean_text, options = _extract_interview_options_cached(text)
+    # Hand each caller a fresh list so the cached tuple can't be mutated
+    return clean_text, list(options) if options is not None else None
 
 
 def should_skip_interview(text: str) -> bool:
     """Check if AI indicated to skip interview."""
+    # The model emits the marker at the end of its reply, so checking
+    # the tail first keeps the scan short; fall back to the full text
+    # in case the marker drifted earlier
+    if "[SKIP_INTERVIEW]" in text[-256:]:
+        return True
+    if len(text) > 4096:
+        # For long (mostly Cyrillic, so non-compact) texts the bytes
+        # scan is cheaper than the str scan; UTF-8 keeps every
+        # character, and an ASCII needle can neither be lost nor
+        # fabricated across multibyte sequences
+        return b"[SKIP_INTERVIEW]" in text.encode("utf-8")
     return "[SKIP_INTERVIEW]" in text
 
 
+def fast_should_interview(text: str, has_image: bool) -> Optional[bool]:
+    """
+    Cheap pre-LLM heuristic for the interview gate.
+
+    Returns False when the question is clearly self-contained and the
+    interview LLM call can be skipped, None when the LLM should decide.
+
+    Args:
+        text: Question text
+        has_image: Whether the question has an attached image
+
+    Returns:
+        False to skip the interview, None to ask the LLM
+    """
+    if has_image:
+        # Photos usually contain the actual task - let the LLM decide
+        return None
+
+    stripped = text.strip()
+
+    # Short, explicitly phrased question without unknown numeric blanks -
+    # almost never needs clarification
+    if len(stripped) <= 120 and stripped.endswith("?") and "..." not in stripped:
+        return False
+
+    return None
+
+
 def format_tokens(tokens: int) -> str:
     """Format token count for display."""
+    # Pure integer arithmetic; no float conversion and formatting
     if tokens >= 1000000:
-        return f"{tokens / 1000000:.1f}M"
+        tenths = tokens // 100000
+        return f"{tenths // 10}.{tenths % 10}M"
     if tokens >= 1000:
-        return f"{tokens / 1000:.1f}K"
+        tenths = tokens // 100
+        return f"{tenths // 10}.{tenths % 10}K"
     return str(tokens)
 
 
 def escape_markdown(text: str) -> str:
     """Escape special Markdown characters for safe sending."""
-    # Characters that need escaping in Telegram Markdown
-    special_chars = ['_', '*', '`', '[']
-    for char in special_chars:
-        text = text.replace(char, '\\' + char)
-    return text
+    # One translate pass instead of four replace copies
+    return text.translate(_ESCAPE_TABLE)
 
 
+@lru_cache(maxsize=256)
 def sanitize_markdown(text: str) -> str:
     """
     Try to fix common Markdown issues.
@@ -136,29 +294,30 @@ def sanitize_markdown(text: str) -> str:
     - Ensures inline code is closed
     - Ensures bold/italic markers are balanced
     """
+    # One regex pass tallies all four marker parities; the C matching
+    # loop replaces the Python-level find/startswith scan
+    code_blocks = inline_code = bold = italic = 0
+    for match in _MD_TOKENS.finditer(text):
+        token = match.group()
+        if token == '```':
+            code_blocks += 1
+        elif token == '**':
+            bold += 1
+        elif token == '`':
+            inline_code += 1
+        else:
+            italic += 1
+
     # Fix unclosed code blocks (```)
-    code_block_count = text.count('```')
-    if code_block_count % 2 != 0:
+    if code_blocks % 2 != 0:
         text += '\n```'
 
-    # Fix unclosed inline code (`)
-    # Count backticks not part of code blocks
-    temp = text.replace('```', '')
-    backtick_count = temp.count('`')
-    if backtick_count % 2 != 0:
+    # Fix unclosed inline code (`), bold (**) and italic (single *)
+    if inline_code % 2 != 0:
         text += '`'
-
-    # Fix unclosed bold (**)
-    bold_count = text.count('**')
-    if bold_count % 2 != 0:
+    if bold % 2 != 0:
         text += '**'
-
-    # Fix unclosed italic (single *)
-    # This is tricky because * is also used in bold
-    # Simple approach: count standalone * not part of **
-    temp = text.replace('**', '')
-    star_count = temp.count('*')
-    if star_count % 2 != 0:
+    if italic % 2 != 0:
         text += '*'
 
     return text
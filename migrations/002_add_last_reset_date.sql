@@ -0,0 +1,6 @@
+-- Migration: Add lazy daily-reset tracking
+-- Run this on existing SQLite database to add the new column
+
+-- Day (MSK) the daily counter was last counted for; the reset itself
+-- is computed lazily on read/write instead of a write-on-read check
+ALTER TABLE users ADD COLUMN last_reset_date DATE;
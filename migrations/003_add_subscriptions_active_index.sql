@@ -0,0 +1,9 @@
+-- Migration: Partial index for active-subscription lookups
+-- Run this on existing SQLite database to add the new index
+
+-- Active-subscription checks filter on user_id + is_active and compare
+-- expires_at; indexing only active rows keeps the index tiny because
+-- expired subscriptions dominate the table over time
+CREATE INDEX IF NOT EXISTS idx_subscriptions_active
+    ON subscriptions (user_id, expires_at)
+    WHERE is_active;